@@ -0,0 +1,139 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+import argparse
+import os
+import tempfile
+import time
+import pymupdf
+
+from mooowu_mcp.highlighter import highlight_spans_parallel
+from mooowu_mcp.parallel import get_page_ranges, map_in_pool, shutdown_pool, warm_pool
+from mooowu_mcp.pdf_reader import TextSpan, extract_all_spans
+
+from synthetic import generate_pdf
+
+
+@dataclass
+class LegacyHighlightTask:
+    pdf_path: str
+    page_start: int
+    page_end: int
+    spans: list[TextSpan]
+    color: tuple[float, float, float]
+    temp_path: str
+
+
+def _legacy_worker(task: LegacyHighlightTask) -> str:
+    doc = pymupdf.open(task.pdf_path)
+    doc.select(list(range(task.page_start, min(task.page_end, len(doc)))))
+
+    for span in task.spans:
+        page = doc[span.page_num - task.page_start]
+        annot = page.add_highlight_annot(pymupdf.Rect(span.bbox))
+        annot.set_colors(stroke=task.color)
+        annot.update()
+
+    doc.save(task.temp_path, garbage=4, deflate=True)
+    doc.close()
+    return task.temp_path
+
+
+def legacy_split_merge(
+    pdf_path: Path,
+    spans: list[TextSpan],
+    output_path: Path,
+    color: tuple[float, float, float] = (1, 1, 0),
+) -> Path:
+    with pymupdf.open(str(pdf_path)) as doc:
+        total_pages = len(doc)
+
+    spans_by_page: dict[int, list[TextSpan]] = defaultdict(list)
+    for span in spans:
+        spans_by_page[span.page_num].append(span)
+
+    temp_dir = tempfile.mkdtemp(prefix="bench_highlight_")
+    tasks = [
+        LegacyHighlightTask(
+            pdf_path=str(pdf_path),
+            page_start=page_range.start,
+            page_end=page_range.end,
+            spans=[
+                span
+                for page_num in range(page_range.start, page_range.end)
+                for span in spans_by_page.get(page_num, [])
+            ],
+            color=color,
+            temp_path=os.path.join(temp_dir, f"part_{i:04d}.pdf"),
+        )
+        for i, page_range in enumerate(get_page_ranges(pdf_path, total_pages))
+    ]
+
+    final_doc = pymupdf.open()
+    for temp_path in map_in_pool(_legacy_worker, tasks):
+        with pymupdf.open(temp_path) as part_doc:
+            final_doc.insert_pdf(part_doc)
+        os.remove(temp_path)
+    final_doc.save(str(output_path), garbage=4, deflate=True)
+    final_doc.close()
+    os.rmdir(temp_dir)
+    return output_path
+
+
+def touched_spans(spans: list[TextSpan], density: float) -> list[TextSpan]:
+    stride = max(1, round(1 / density)) if density > 0 else 0
+    if not stride:
+        return []
+    return [span for span in spans if span.page_num % stride == 0]
+
+
+def best_of(repeat: int, func, *args) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument(
+        "--density", type=float, nargs="+", default=[0.01, 0.1, 0.5, 1.0]
+    )
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    warm_pool()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        print(f"{'pages':>6} {'density':>8} {'spans':>7} "
+              f"{'legacy_s':>9} {'touched_s':>10} {'speedup':>8}")
+        for page_count in args.pages:
+            pdf_path = generate_pdf(
+                tmp_dir / f"{page_count}.pdf", page_count, "text", args.lines
+            )
+            all_spans = extract_all_spans(pdf_path)
+            crossover = None
+            for density in args.density:
+                spans = touched_spans(all_spans, density)
+                legacy = best_of(
+                    args.repeat, legacy_split_merge, pdf_path, spans,
+                    tmp_dir / "legacy.pdf",
+                )
+                touched = best_of(
+                    args.repeat, highlight_spans_parallel, pdf_path, spans,
+                    tmp_dir / "touched.pdf",
+                )
+                if crossover is None and legacy < touched:
+                    crossover = density
+                print(f"{page_count:>6} {density:>8.2f} {len(spans):>7} "
+                      f"{legacy:>9.3f} {touched:>10.3f} {legacy / touched:>7.1f}x")
+            print(f"{'':>6} crossover density: {crossover or 'none'}")
+    shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
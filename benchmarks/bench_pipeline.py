@@ -0,0 +1,216 @@
+from pathlib import Path
+from typing import Any, Callable
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import pymupdf
+
+from mooowu_mcp import parallel
+from mooowu_mcp.cache import get_extraction_cache
+from mooowu_mcp.content_filter import filter_sentences
+from mooowu_mcp.highlighter import highlight_sentences
+from mooowu_mcp.pdf_reader import extract_document, extract_sentences
+from mooowu_mcp.server import analyze_pdf, highlight_pdf, read_pdf
+
+from synthetic import LAYOUTS, generate_pdf
+
+DEFAULT_PAGES = [10, 100, 1000, 5000]
+DEFAULT_WORKERS = sorted({1, 2, 4, parallel.MAX_WORKERS})
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_SECONDS = 0.05
+HIGHLIGHT_QUERY_COUNT = 50
+
+Stage = Callable[[Path, Path], Any]
+
+
+def _cold(func: Callable[[Path, Path], Any]) -> Stage:
+    def run(pdf_path: Path, tmp_dir: Path) -> Any:
+        get_extraction_cache().invalidate()
+        return func(pdf_path, tmp_dir)
+
+    return run
+
+
+def _filter_stage(pdf_path: Path, tmp_dir: Path) -> Any:
+    document = extract_document(pdf_path)
+    return filter_sentences(document.sentences, pdf_path, document.images)
+
+
+def _highlight_stage(pdf_path: Path, tmp_dir: Path) -> Any:
+    document = extract_document(pdf_path)
+    filtered = filter_sentences(document.sentences, pdf_path, document.images)
+    return highlight_sentences(pdf_path, filtered, tmp_dir / "highlighted.pdf")
+
+
+def _highlight_tool_stage(pdf_path: Path, tmp_dir: Path) -> Any:
+    queries = [s.text for s in extract_sentences(pdf_path)[:HIGHLIGHT_QUERY_COUNT]]
+    get_extraction_cache().invalidate()
+    return asyncio.run(
+        highlight_pdf(str(pdf_path), queries, str(tmp_dir / "tool_highlighted.pdf"))
+    )
+
+
+def _reference_stage(pdf_path: Path, tmp_dir: Path) -> Any:
+    with pymupdf.open(str(pdf_path)) as doc:
+        return [page.get_text() for page in doc]
+
+
+STAGES: dict[str, Stage] = {
+    "extract_sentences": _cold(lambda path, _: extract_sentences(path)),
+    "filter_sentences": _filter_stage,
+    "highlight_sentences": _highlight_stage,
+    "read_pdf": _cold(lambda path, _: asyncio.run(read_pdf(str(path)))),
+    "analyze_pdf": _cold(lambda path, _: asyncio.run(analyze_pdf(str(path)))),
+    "highlight_pdf": _highlight_tool_stage,
+}
+
+
+def set_workers(workers: int) -> None:
+    parallel.shutdown_pool()
+    parallel.MAX_WORKERS = workers
+    parallel.warm_pool()
+
+
+def time_stage(stage: Stage, pdf_path: Path, tmp_dir: Path, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage(pdf_path, tmp_dir)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def result_key(result: dict[str, Any]) -> str:
+    return "/".join(
+        str(result[field]) for field in ("layout", "pages", "stage", "workers")
+    )
+
+
+def run_suite(
+    layouts: list[str],
+    page_counts: list[int],
+    workers: list[int],
+    stages: list[str],
+    repeat: int,
+    tmp_dir: Path,
+) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = []
+    for layout in layouts:
+        for page_count in page_counts:
+            pdf_path = generate_pdf(
+                tmp_dir / f"{layout}_{page_count}.pdf", page_count, layout
+            )
+            reference = time_stage(_reference_stage, pdf_path, tmp_dir, repeat)
+            serial: dict[str, float] = {}
+            for worker_count in workers:
+                set_workers(worker_count)
+                for stage in stages:
+                    seconds = time_stage(STAGES[stage], pdf_path, tmp_dir, repeat)
+                    serial.setdefault(stage, seconds)
+                    result = {
+                        "layout": layout,
+                        "pages": page_count,
+                        "stage": stage,
+                        "workers": worker_count,
+                        "seconds": round(seconds, 6),
+                        "pages_per_s": round(page_count / seconds, 2),
+                        "speedup": round(serial[stage] / seconds, 3),
+                        "reference_seconds": round(reference, 6),
+                        "relative": round(seconds / reference, 3),
+                    }
+                    results.append(result)
+                    print(
+                        f"{layout:>10} {page_count:>6} {stage:>20} "
+                        f"{worker_count:>3}w {seconds:>9.3f}s "
+                        f"{result['pages_per_s']:>9.1f} p/s "
+                        f"{result['speedup']:>5.2f}x "
+                        f"{result['relative']:>8.2f}r",
+                        flush=True,
+                    )
+    return results
+
+
+def compare_to_baseline(
+    results: list[dict[str, Any]],
+    baseline: dict[str, Any],
+    tolerance: float,
+) -> list[str]:
+    previous = {result_key(r): r for r in baseline["results"]}
+    cpus = min(os.cpu_count() or 1, baseline["environment"]["cpu_count"] or 1)
+    regressions: list[str] = []
+    for result in results:
+        base = previous.get(result_key(result))
+        if base is None or "relative" not in base or result["workers"] > cpus:
+            continue
+        expected = base["relative"] * result["reference_seconds"]
+        slower = result["seconds"] - expected
+        if result["seconds"] > expected * (1 + tolerance) and (
+            slower > MIN_REGRESSION_SECONDS
+        ):
+            regressions.append(
+                f"{result_key(result)}: {result['relative']:.2f}x reference "
+                f"vs baseline {base['relative']:.2f}x"
+            )
+    return regressions
+
+
+def environment() -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "pymupdf": pymupdf.VersionBind,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=list(LAYOUTS))
+    parser.add_argument("--pages", type=int, nargs="+", default=DEFAULT_PAGES)
+    parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKERS)
+    parser.add_argument(
+        "--stages", nargs="+", choices=list(STAGES), default=list(STAGES)
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run_suite(
+            args.layouts,
+            args.pages,
+            sorted(args.workers),
+            args.stages,
+            args.repeat,
+            Path(tmp),
+        )
+    parallel.shutdown_pool()
+
+    args.output.write_text(
+        json.dumps({"environment": environment(), "results": results}, indent=2)
+    )
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.baseline is None:
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        return 1
+    print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
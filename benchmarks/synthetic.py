@@ -0,0 +1,130 @@
+from pathlib import Path
+from typing import Callable
+import pymupdf
+
+LAYOUTS = ("text", "figures", "code", "two-column")
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+MARGIN = 72
+LINE_HEIGHT = 14
+FONT_SIZE = 10
+
+SENTENCES = (
+    "The quick brown fox jumps over the lazy dog.",
+    "Parallel extraction keeps every worker busy on its own page range.",
+    "Results are merged in page order before filtering.",
+    "Figures and code listings are excluded from the readable text.",
+)
+CODE_LINES = (
+    "def process(items):",
+    "    for item in items:",
+    "        yield transform(item)",
+    "",
+)
+
+
+def _sentence(page_num: int, line: int) -> str:
+    return f"Page {page_num + 1} line {line + 1}. {SENTENCES[line % len(SENTENCES)]}"
+
+
+def _text_page(page: pymupdf.Page, page_num: int, lines: int) -> None:
+    for line in range(lines):
+        page.insert_text(
+            (MARGIN, MARGIN + line * LINE_HEIGHT),
+            _sentence(page_num, line),
+            fontsize=FONT_SIZE,
+        )
+
+
+def _figures_page(page: pymupdf.Page, page_num: int, lines: int) -> None:
+    pixmap = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, 32, 32), False)
+    pixmap.set_rect(pixmap.irect, (page_num * 37 % 256, 120, 200))
+
+    figure_height = (PAGE_HEIGHT - 2 * MARGIN) // 3
+    for figure in range(2):
+        top = MARGIN + figure * (figure_height + 2 * LINE_HEIGHT)
+        rect = pymupdf.Rect(MARGIN, top, PAGE_WIDTH - MARGIN, top + figure_height)
+        page.insert_image(rect, pixmap=pixmap)
+        page.insert_text(
+            (MARGIN + 10, top + figure_height / 2),
+            f"Figure label {page_num + 1}.{figure + 1}",
+            fontsize=FONT_SIZE,
+        )
+        page.insert_text(
+            (MARGIN, rect.y1 + LINE_HEIGHT),
+            f"Figure {page_num + 1}.{figure + 1}. {SENTENCES[figure]}",
+            fontsize=FONT_SIZE,
+        )
+
+    body_top = MARGIN + 2 * (figure_height + 2 * LINE_HEIGHT)
+    body_lines = max(0, min(lines, int((PAGE_HEIGHT - body_top) // LINE_HEIGHT)))
+    for line in range(body_lines):
+        page.insert_text(
+            (MARGIN, body_top + line * LINE_HEIGHT),
+            _sentence(page_num, line),
+            fontsize=FONT_SIZE,
+        )
+
+
+def _code_page(page: pymupdf.Page, page_num: int, lines: int) -> None:
+    for line in range(lines):
+        if line % 3 == 0:
+            page.insert_text(
+                (MARGIN, MARGIN + line * LINE_HEIGHT),
+                _sentence(page_num, line),
+                fontsize=FONT_SIZE,
+            )
+        else:
+            page.insert_text(
+                (MARGIN, MARGIN + line * LINE_HEIGHT),
+                CODE_LINES[line % len(CODE_LINES)],
+                fontname="cour",
+                fontsize=FONT_SIZE,
+            )
+
+
+def _two_column_page(page: pymupdf.Page, page_num: int, lines: int) -> None:
+    column_width = (PAGE_WIDTH - 2 * MARGIN - 24) / 2
+    for column in range(2):
+        rect = pymupdf.Rect(
+            MARGIN + column * (column_width + 24),
+            MARGIN,
+            MARGIN + column * (column_width + 24) + column_width,
+            PAGE_HEIGHT - MARGIN,
+        )
+        text = " ".join(
+            _sentence(page_num, column * lines + line) for line in range(lines // 2)
+        )
+        page.insert_textbox(rect, text, fontsize=FONT_SIZE)
+
+
+LAYOUT_WRITERS: dict[str, Callable[[pymupdf.Page, int, int], None]] = {
+    "text": _text_page,
+    "figures": _figures_page,
+    "code": _code_page,
+    "two-column": _two_column_page,
+}
+
+
+def generate_pdf(
+    path: str | Path,
+    page_count: int,
+    layout: str = "text",
+    lines_per_page: int = 40,
+) -> Path:
+    writer = LAYOUT_WRITERS.get(layout)
+    if writer is None:
+        raise ValueError(f"Unknown layout: {layout}")
+
+    doc = pymupdf.open()
+    for page_num in range(page_count):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        writer(page, page_num, lines_per_page)
+
+    doc.set_toc(
+        [[1, f"Chapter {i // 10 + 1}", i + 1] for i in range(0, page_count, 10)]
+    )
+    doc.save(str(path), garbage=3, deflate=True)
+    doc.close()
+    return Path(path)
@@ -0,0 +1,125 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+import heapq
+import itertools
+
+import anyio
+
+INTERACTIVE = 0
+BULK = 1
+
+
+class ServerBusyError(RuntimeError):
+    pass
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    sequence: int
+    event: anyio.Event = field(compare=False, default_factory=anyio.Event)
+    admitted: bool = field(compare=False, default=False)
+
+
+class AdmissionController:
+    def __init__(self, max_running: int, max_queued: int):
+        if max_running < 1:
+            raise ValueError("Concurrency limit must be at least 1")
+        if max_queued < 0:
+            raise ValueError("Queue limit must not be negative")
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self._running = 0
+        self._running_bulk = 0
+        self._waiting: list[_Waiter] = []
+        self._sequence = itertools.count()
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiting)
+
+    @property
+    def bulk_limit(self) -> int:
+        return max(1, self.max_running - 1)
+
+    def set_limits(
+        self,
+        max_running: int | None = None,
+        max_queued: int | None = None,
+    ) -> None:
+        if max_running is not None:
+            if max_running < 1:
+                raise ValueError("Concurrency limit must be at least 1")
+            self.max_running = max_running
+        if max_queued is not None:
+            if max_queued < 0:
+                raise ValueError("Queue limit must not be negative")
+            self.max_queued = max_queued
+        self._dispatch()
+
+    def _can_start(self, priority: int) -> bool:
+        if self._running >= self.max_running:
+            return False
+        return priority == INTERACTIVE or self._running_bulk < self.bulk_limit
+
+    def _start(self, priority: int) -> None:
+        self._running += 1
+        if priority != INTERACTIVE:
+            self._running_bulk += 1
+
+    def _finish(self, priority: int) -> None:
+        self._running -= 1
+        if priority != INTERACTIVE:
+            self._running_bulk -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._waiting and self._can_start(self._waiting[0].priority):
+            waiter = heapq.heappop(self._waiting)
+            self._start(waiter.priority)
+            waiter.admitted = True
+            waiter.event.set()
+
+    def _busy_error(self) -> ServerBusyError:
+        return ServerBusyError(
+            f"Server busy: {self._running} requests running and "
+            f"{len(self._waiting)} queued; retry later"
+        )
+
+    def check_capacity(self) -> None:
+        if self._running >= self.max_running and len(self._waiting) >= self.max_queued:
+            raise self._busy_error()
+
+    async def _wait_for_slot(self, priority: int) -> None:
+        if len(self._waiting) >= self.max_queued:
+            raise self._busy_error()
+
+        waiter = _Waiter(priority, next(self._sequence))
+        heapq.heappush(self._waiting, waiter)
+        try:
+            await waiter.event.wait()
+        except BaseException:
+            if waiter.admitted:
+                self._finish(priority)
+            else:
+                self._waiting.remove(waiter)
+                heapq.heapify(self._waiting)
+            raise
+
+    @asynccontextmanager
+    async def admit(self, priority: int = INTERACTIVE) -> AsyncIterator[None]:
+        queue_ahead = self._waiting and self._waiting[0].priority <= priority
+        if not queue_ahead and self._can_start(priority):
+            self._start(priority)
+        else:
+            await self._wait_for_slot(priority)
+
+        try:
+            yield
+        finally:
+            self._finish(priority)
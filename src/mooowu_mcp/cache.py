@@ -0,0 +1,201 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+import hashlib
+import os
+import sys
+import threading
+
+T = TypeVar("T")
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class FileKey:
+    path: str
+    mtime_ns: int
+    size: int
+    content_hash: str | None = None
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+
+def hash_file(pdf_path: str | Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(pdf_path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_key(pdf_path: str | Path, hash_content: bool = False) -> FileKey:
+    path = os.path.realpath(pdf_path)
+    stat = os.stat(path)
+    content_hash = hash_file(path) if hash_content else None
+    return FileKey(
+        path=path,
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        content_hash=content_hash,
+    )
+
+
+def estimate_size(value: Any) -> int:
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+
+    seen: set[int] = set()
+    total = 0
+    stack = [value]
+
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+
+        if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(vars(obj))
+            for slot in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+
+    return total
+
+
+class ExtractionCache:
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        hash_content: bool = False,
+    ):
+        self.max_bytes = max_bytes
+        self.hash_content = hash_content
+        self._entries: OrderedDict[tuple[FileKey, str], tuple[Any, int]] = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+        self._inflight: dict[tuple[FileKey, str], threading.Lock] = {}
+
+    def key_for(self, pdf_path: str | Path) -> FileKey:
+        return file_key(pdf_path, self.hash_content)
+
+    def get(self, key: FileKey, kind: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get((key, kind))
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end((key, kind))
+            self._hits += 1
+            return entry[0]
+
+    def put(
+        self,
+        key: FileKey,
+        kind: str,
+        value: Any,
+        nbytes: int | None = None,
+    ) -> None:
+        if nbytes is None:
+            nbytes = estimate_size(value)
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop((key, kind), None)
+            if old is not None:
+                self._bytes -= old[1]
+
+            self._entries[(key, kind)] = (value, nbytes)
+            self._bytes += nbytes
+
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+                self._evictions += 1
+
+    def get_or_compute(
+        self,
+        pdf_path: str | Path,
+        kind: str,
+        compute: Callable[[], T],
+        size: Callable[[T], int] | None = None,
+    ) -> T:
+        key = self.key_for(pdf_path)
+        cached = self.get(key, kind)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            flight = self._inflight.setdefault((key, kind), threading.Lock())
+
+        with flight:
+            with self._lock:
+                entry = self._entries.get((key, kind))
+            if entry is not None:
+                return entry[0]
+
+            try:
+                value = compute()
+                self.put(key, kind, value, None if size is None else size(value))
+            finally:
+                with self._lock:
+                    self._inflight.pop((key, kind), None)
+        return value
+
+    def invalidate(self, pdf_path: str | Path | None = None) -> int:
+        with self._lock:
+            if pdf_path is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+                return removed
+
+            path = os.path.realpath(pdf_path)
+            stale = [k for k in self._entries if k[0].path == path]
+            for k in stale:
+                _, nbytes = self._entries.pop(k)
+                self._bytes -= nbytes
+            return len(stale)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+            )
+
+
+_cache = ExtractionCache()
+
+
+def get_extraction_cache() -> ExtractionCache:
+    return _cache
@@ -1,108 +1,107 @@
 from pathlib import Path
-from collections import defaultdict
 from dataclasses import dataclass
+from functools import partial
 from typing import Any
-
-from .pdf_reader import TextSpan, Sentence
-from .parallel import PageRange, process_pages_parallel
+import numpy as np
 import pymupdf
 
-
-def _make_bbox(bbox_list: Any) -> tuple[float, float, float, float]:
-    return (
-        float(bbox_list[0]),
-        float(bbox_list[1]),
-        float(bbox_list[2]),
-        float(bbox_list[3]),
-    )
-
-
-MONOSPACE_FONTS = frozenset(
-    [
-        "courier",
-        "mono",
-        "consolas",
-        "menlo",
-        "monaco",
-        "source code",
-        "fira",
-        "jetbrains",
-        "inconsolata",
-        "lucida console",
-        "dejavu sans mono",
-        "liberation mono",
-        "cour",
-    ]
+from .cache import get_extraction_cache
+from .fonts import MONOSPACE_FONTS as MONOSPACE_FONTS, is_code_font as is_code_font
+from .parallel import PageRange, open_document, process_pages_parallel
+from .pdf_reader import (
+    IMAGE_REGION_BYTES,
+    TextSpan,
+    Sentence,
+    ImageRegion,
+    document_cache_kind,
+    extract_document,
+    sentences_nbytes,
 )
+from .selection import format_page_selection
+from .spatial import SpatialIndex
+from .timing import count, stage
 
 
 def is_code_span(span: TextSpan) -> bool:
-    font_lower = span.font.lower()
-    return any(mono in font_lower for mono in MONOSPACE_FONTS)
+    return span.is_code
 
 
 def filter_code_spans(spans: list[TextSpan]) -> list[TextSpan]:
-    return [span for span in spans if not is_code_span(span)]
-
-
-@dataclass
-class ImageRegion:
-    bbox: tuple[float, float, float, float]
-    page_num: int
+    return [span for span in spans if not span.is_code]
+
+
+def _page_image_geometry(
+    page: Any,
+    page_num: int,
+    include_drawings: bool,
+) -> list[ImageRegion]:
+    boxes = [info["bbox"] for info in page.get_image_info()]
+    if include_drawings:
+        boxes.extend(page.cluster_drawings())
+    return [
+        ImageRegion(bbox=tuple(pymupdf.Rect(box)), page_num=page_num)
+        for box in boxes
+    ]
 
 
-def _extract_images_from_page_range(page_range: PageRange) -> list[ImageRegion]:
-    doc = pymupdf.open(page_range.pdf_path)
+def _image_geometry_from_page_range(
+    page_range: PageRange,
+    include_drawings: bool = False,
+) -> list[ImageRegion]:
     regions: list[ImageRegion] = []
-
-    for page_num in range(page_range.start, page_range.end):
-        if page_num >= len(doc):
-            break
-
-        page = doc[page_num]
-        page_dict: Any = page.get_text("dict")
-
-        for block in page_dict["blocks"]:
-            if block.get("type") == 1:
-                region = ImageRegion(
-                    bbox=_make_bbox(block["bbox"]),
-                    page_num=page_num,
-                )
-                regions.append(region)
-
-    doc.close()
+    with open_document(page_range.pdf_path) as doc:
+        for page_num in range(page_range.start, min(page_range.end, len(doc))):
+            regions.extend(
+                _page_image_geometry(doc[page_num], page_num, include_drawings)
+            )
     return regions
 
 
-def get_image_regions(pdf_path: str | Path) -> list[ImageRegion]:
-    doc = pymupdf.open(str(pdf_path))
-    total_pages = len(doc)
-    doc.close()
-
-    return process_pages_parallel(
+def _image_geometry(
+    pdf_path: str | Path,
+    pages: list[int] | None,
+    include_drawings: bool,
+) -> list[ImageRegion]:
+    with open_document(str(pdf_path)) as doc:
+        total_pages = len(doc)
+    with stage("image_geometry"):
+        return process_pages_parallel(
+            str(pdf_path),
+            total_pages,
+            partial(_image_geometry_from_page_range, include_drawings=include_drawings),
+            pages,
+        )
+
+
+def image_cache_kind(pages: list[int] | None, include_drawings: bool) -> str:
+    kind = "images:drawings" if include_drawings else "images"
+    if pages is None:
+        return kind
+    return f"{kind}:{format_page_selection(pages)}"
+
+
+def get_image_regions(
+    pdf_path: str | Path,
+    pages: list[int] | None = None,
+    include_drawings: bool = False,
+) -> list[ImageRegion]:
+    regions = get_extraction_cache().get_or_compute(
         pdf_path,
-        total_pages,
-        _extract_images_from_page_range,
+        image_cache_kind(pages, include_drawings),
+        partial(_image_geometry, pdf_path, pages, include_drawings),
+        lambda regions: IMAGE_REGION_BYTES * len(regions),
     )
+    return list(regions)
 
 
-def _is_span_overlapping_page_images(
+def is_span_overlapping_image(
     span: TextSpan,
-    page_images: list[ImageRegion],
+    images: list[ImageRegion] | SpatialIndex,
 ) -> bool:
-    sx0, sy0, sx1, sy1 = span.bbox
+    if isinstance(images, SpatialIndex):
+        return images.any_overlap(span.bbox, span.page_num)
 
-    for img in page_images:
-        ix0, iy0, ix1, iy1 = img.bbox
-        if sx0 < ix1 and sx1 > ix0 and sy0 < iy1 and sy1 > iy0:
-            return True
-
-    return False
-
-
-def is_span_overlapping_image(span: TextSpan, images: list[ImageRegion]) -> bool:
     sx0, sy0, sx1, sy1 = span.bbox
-
     for img in images:
         if img.page_num != span.page_num:
             continue
@@ -117,9 +116,73 @@ def is_span_overlapping_image(span: TextSpan, images: list[ImageRegion]) -> bool
 
 def filter_image_overlapping_spans(
     spans: list[TextSpan],
-    images: list[ImageRegion],
+    images: list[ImageRegion] | SpatialIndex,
 ) -> list[TextSpan]:
-    return [span for span in spans if not is_span_overlapping_image(span, images)]
+    index = images if isinstance(images, SpatialIndex) else SpatialIndex(images)
+    return [
+        span for span in spans if not index.any_overlap(span.bbox, span.page_num)
+    ]
+
+
+@dataclass
+class PackedSpans:
+    spans: list[TextSpan]
+    bboxes: np.ndarray
+    pages: np.ndarray
+    code: np.ndarray
+    sentence_ids: np.ndarray
+
+
+def pack_sentence_spans(sentences: list[Sentence]) -> PackedSpans:
+    spans: list[TextSpan] = []
+    sentence_ids: list[int] = []
+
+    for sentence_id, sentence in enumerate(sentences):
+        spans.extend(sentence.spans)
+        sentence_ids.extend([sentence_id] * len(sentence.spans))
+
+    bboxes = np.array([span.bbox for span in spans], dtype=np.float64)
+    return PackedSpans(
+        spans=spans,
+        bboxes=bboxes.reshape(len(spans), 4),
+        pages=np.fromiter((span.page_num for span in spans), np.int32, len(spans)),
+        code=np.fromiter((span.is_code for span in spans), bool, len(spans)),
+        sentence_ids=np.array(sentence_ids, dtype=np.int32),
+    )
+
+
+def _image_overlap_mask(packed: PackedSpans, images: list[ImageRegion]) -> np.ndarray:
+    overlap = np.zeros(len(packed.spans), dtype=bool)
+    if not images or not packed.spans:
+        return overlap
+
+    image_pages = np.fromiter((img.page_num for img in images), np.int32, len(images))
+    image_boxes = np.array([img.bbox for img in images], dtype=np.float64)
+
+    span_order = np.argsort(packed.pages, kind="stable")
+    sorted_pages = packed.pages[span_order]
+
+    for page_num in np.unique(image_pages):
+        lo, hi = np.searchsorted(sorted_pages, [page_num, page_num + 1])
+        if lo == hi:
+            continue
+
+        span_idx = span_order[lo:hi]
+        s = packed.bboxes[span_idx]
+        i = image_boxes[image_pages == page_num]
+        hits = (
+            (s[:, 0, None] < i[None, :, 2])
+            & (s[:, 2, None] > i[None, :, 0])
+            & (s[:, 1, None] < i[None, :, 3])
+            & (s[:, 3, None] > i[None, :, 1])
+        )
+        overlap[span_idx] = hits.any(axis=1)
+
+    return overlap
+
+
+def span_keep_mask(packed: PackedSpans, images: list[ImageRegion]) -> np.ndarray:
+    return ~packed.code & ~_image_overlap_mask(packed, images)
 
 
 def filter_sentences(
@@ -130,28 +193,85 @@ def filter_sentences(
     if images is None:
         images = get_image_regions(pdf_path)
 
-    images_by_page: dict[int, list[ImageRegion]] = defaultdict(list)
-    for img in images:
-        images_by_page[img.page_num].append(img)
+    with stage("filter"):
+        return _filter_packed(sentences, images)
 
-    filtered: list[Sentence] = []
 
-    for sentence in sentences:
-        valid_spans = filter_code_spans(sentence.spans)
+def _keep_counts(
+    sentences: list[Sentence],
+    images: list[ImageRegion],
+) -> tuple[PackedSpans, np.ndarray, np.ndarray, np.ndarray]:
+    packed = pack_sentence_spans(sentences)
+    keep = span_keep_mask(packed, images)
+    count("spans_filtered", int(len(keep) - keep.sum()))
+
+    total = np.bincount(packed.sentence_ids, minlength=len(sentences))
+    kept = np.bincount(packed.sentence_ids[keep], minlength=len(sentences))
+    return packed, keep, total, kept
+
+
+def _filter_packed(
+    sentences: list[Sentence],
+    images: list[ImageRegion],
+) -> list[Sentence]:
+    packed, keep, total, kept = _keep_counts(sentences, images)
+    offsets = np.concatenate(([0], np.cumsum(total)))
+
+    filtered: list[Sentence] = []
+    for sentence_id in np.flatnonzero(kept).tolist():
+        sentence = sentences[sentence_id]
+        if kept[sentence_id] == total[sentence_id]:
+            filtered.append(sentence)
+            continue
 
-        page_images = images_by_page.get(sentence.page_num, [])
+        start, end = offsets[sentence_id], offsets[sentence_id + 1]
         valid_spans = [
-            span
-            for span in valid_spans
-            if not _is_span_overlapping_page_images(span, page_images)
+            packed.spans[start + i] for i in np.flatnonzero(keep[start:end]).tolist()
         ]
-
-        if valid_spans:
-            filtered_sentence = Sentence(
+        filtered.append(
+            Sentence(
                 text=sentence.text,
                 spans=valid_spans,
                 page_num=sentence.page_num,
             )
-            filtered.append(filtered_sentence)
+        )
 
     return filtered
+
+
+def count_highlightable(
+    sentences: list[Sentence],
+    pdf_path: str | Path,
+    images: list[ImageRegion] | None = None,
+) -> int:
+    if images is None:
+        images = get_image_regions(pdf_path)
+
+    with stage("filter"):
+        _, _, _, kept = _keep_counts(sentences, images)
+        return int(np.count_nonzero(kept))
+
+
+def filtered_cache_kind(pages: list[int] | None, include_drawings: bool) -> str:
+    kind = f"filtered:{document_cache_kind(pages)}"
+    return f"{kind}:drawings" if include_drawings else kind
+
+
+def get_filtered_sentences(
+    pdf_path: str | Path,
+    pages: list[int] | None = None,
+    include_drawings: bool = False,
+) -> list[Sentence]:
+    def compute() -> list[Sentence]:
+        document = extract_document(pdf_path, pages)
+        images = document.images
+        if include_drawings:
+            images = get_image_regions(pdf_path, pages, include_drawings=True)
+        return filter_sentences(document.sentences, pdf_path, images)
+
+    return get_extraction_cache().get_or_compute(
+        pdf_path,
+        filtered_cache_kind(pages, include_drawings),
+        compute,
+        sentences_nbytes,
+    )
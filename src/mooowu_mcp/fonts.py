@@ -0,0 +1,129 @@
+from array import array
+from dataclasses import dataclass
+from typing import Any, Iterator
+import pymupdf
+
+
+MONOSPACE_FONTS = frozenset(
+    [
+        "courier",
+        "mono",
+        "consolas",
+        "menlo",
+        "monaco",
+        "source code",
+        "fira",
+        "jetbrains",
+        "inconsolata",
+        "lucida console",
+        "dejavu sans mono",
+        "liberation mono",
+        "cour",
+    ]
+)
+SYMBOL_FONTS = frozenset(
+    ["symbol", "dingbat", "wingding", "zapf", "cmsy", "cmex", "msam", "msbm"]
+)
+BOLD_MARKERS = ("bold", "black", "heavy", "demi")
+ITALIC_MARKERS = ("italic", "oblique", "slanted")
+
+FONT_STYLE_FLAGS = (
+    pymupdf.TEXT_FONT_ITALIC
+    | pymupdf.TEXT_FONT_SERIFED
+    | pymupdf.TEXT_FONT_MONOSPACED
+    | pymupdf.TEXT_FONT_BOLD
+)
+
+
+def is_code_font(font: str) -> bool:
+    font_lower = font.lower()
+    return any(mono in font_lower for mono in MONOSPACE_FONTS)
+
+
+@dataclass(frozen=True, slots=True)
+class FontInfo:
+    name: str
+    monospace: bool
+    bold: bool
+    italic: bool
+    symbol: bool
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "monospace": self.monospace,
+            "bold": self.bold,
+            "italic": self.italic,
+            "symbol": self.symbol,
+        }
+
+
+def classify_font(name: str, flags: int = 0) -> FontInfo:
+    name_lower = name.lower()
+    return FontInfo(
+        name=name,
+        monospace=bool(flags & pymupdf.TEXT_FONT_MONOSPACED) or is_code_font(name),
+        bold=bool(flags & pymupdf.TEXT_FONT_BOLD)
+        or any(marker in name_lower for marker in BOLD_MARKERS),
+        italic=bool(flags & pymupdf.TEXT_FONT_ITALIC)
+        or any(marker in name_lower for marker in ITALIC_MARKERS),
+        symbol=any(symbol in name_lower for symbol in SYMBOL_FONTS),
+    )
+
+
+class FontRegistry:
+    __slots__ = ("names", "flags", "_index", "_info", "_code")
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self.flags = array("I")
+        self._index: dict[str, int] = {}
+        self._info: list[FontInfo] = []
+        self._code: list[bool] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[FontInfo]:
+        for font_id in range(len(self.names)):
+            yield self.info(font_id)
+
+    def intern(self, name: str, flags: int = 0) -> int:
+        font_id = self._index.get(name)
+        if font_id is None:
+            font_id = self._index[name] = len(self.names)
+            self.names.append(name)
+            self.flags.append(flags & FONT_STYLE_FLAGS)
+        return font_id
+
+    def _classify_pending(self) -> None:
+        for font_id in range(len(self._info), len(self.names)):
+            info = classify_font(self.names[font_id], self.flags[font_id])
+            self._info.append(info)
+            self._code.append(info.monospace)
+
+    def info(self, font_id: int) -> FontInfo:
+        if font_id >= len(self._info):
+            self._classify_pending()
+        return self._info[font_id]
+
+    def code_mask(self) -> list[bool]:
+        if len(self._code) < len(self.names):
+            self._classify_pending()
+        return self._code
+
+    def code_fonts(self) -> list[str]:
+        return [info.name for info in self if info.monospace]
+
+    def merge(self, other: "FontRegistry") -> None:
+        for name, flags in zip(other.names, other.flags):
+            self.intern(name, flags)
+
+    def __getstate__(self) -> tuple:
+        return (self.names, self.flags)
+
+    def __setstate__(self, state: tuple) -> None:
+        self.names, self.flags = state
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self._info = []
+        self._code = []
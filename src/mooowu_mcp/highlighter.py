@@ -1,115 +1,263 @@
-from concurrent.futures import ProcessPoolExecutor
 from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Literal
 import os
+import shutil
 import tempfile
 import pymupdf
 
 from .pdf_reader import TextSpan, Sentence
-from .parallel import PageRange, get_page_ranges, MAX_WORKERS, DEFAULT_CHUNK_SIZE
+from .parallel import map_in_pool, DEFAULT_CHUNK_SIZE
+from .timing import count, stage
 
 
-@dataclass
-class HighlightTask:
-    pdf_path: str
-    page_start: int
-    page_end: int
-    spans: list[TextSpan]
-    color: tuple[float, float, float]
-    temp_path: str
+SaveMode = Literal["rewrite", "incremental"]
+SAVE_MODES = ("rewrite", "incremental")
 
 
-def _highlight_page_range_worker(task: HighlightTask) -> str:
-    doc = pymupdf.open(task.pdf_path)
-    total_pages = len(doc)
+def _document_id(doc: pymupdf.Document) -> str | None:
+    kind, value = doc.xref_get_key(-1, "ID")
+    if kind != "array":
+        return None
+    return value.split(">", 1)[0].lstrip("[< ")
 
-    pages_to_keep = list(range(task.page_start, min(task.page_end, total_pages)))
-    if not pages_to_keep:
+
+def _output_matches_source(pdf_path: Path, output_path: Path) -> bool:
+    if output_path.stat().st_mtime_ns < pdf_path.stat().st_mtime_ns:
+        return False
+    try:
+        with pymupdf.open(str(pdf_path)) as source:
+            expected = (len(source), _document_id(source))
+        with pymupdf.open(str(output_path)) as output:
+            return (len(output), _document_id(output)) == expected
+    except pymupdf.FileDataError:
+        return False
+
+
+def _open_for_highlight(
+    pdf_path: Path,
+    output_path: Path,
+    save_mode: SaveMode,
+) -> pymupdf.Document:
+    if save_mode not in SAVE_MODES:
+        raise ValueError(f"Unknown save mode: {save_mode}")
+
+    if save_mode == "incremental":
+        if not output_path.exists() or not _output_matches_source(
+            pdf_path, output_path
+        ):
+            shutil.copyfile(pdf_path, output_path)
+        return pymupdf.open(str(output_path))
+
+    return pymupdf.open(str(pdf_path))
+
+
+def _save_highlighted(
+    doc: pymupdf.Document,
+    output_path: Path,
+    save_mode: SaveMode,
+) -> None:
+    if save_mode == "rewrite":
+        doc.save(str(output_path))
         doc.close()
-        empty_doc = pymupdf.open()
-        empty_doc.save(task.temp_path)
-        empty_doc.close()
-        return task.temp_path
-
-    doc.select(pages_to_keep)
-
-    for span in task.spans:
-        relative_page = span.page_num - task.page_start
-        if 0 <= relative_page < len(doc):
-            page = doc[relative_page]
-            rect = pymupdf.Rect(span.bbox)
-            annot = page.add_highlight_annot(rect)
-            annot.set_colors(stroke=task.color)
-            annot.update()
+        return
 
-    doc.save(task.temp_path, garbage=4, deflate=True)
-    doc.close()
-    return task.temp_path
+    if doc.can_save_incrementally():
+        doc.saveIncr()
+        doc.close()
+        return
 
+    fd, temp_path = tempfile.mkstemp(suffix=".pdf", dir=output_path.parent)
+    os.close(fd)
+    try:
+        doc.save(temp_path)
+        doc.close()
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
-def highlight_spans_parallel(
+
+PARALLEL_GEOMETRY_MIN_PAGES = 32
+SAME_LINE_OVERLAP = 0.5
+ADJACENT_GAP_RATIO = 0.5
+
+Rect = tuple[float, float, float, float]
+
+
+@dataclass(slots=True)
+class PageHighlights:
+    page_num: int
+    annotations: list[list[Rect]]
+
+
+def _same_line_adjacent(a: Rect, b: Rect) -> bool:
+    height = min(a[3] - a[1], b[3] - b[1])
+    if height <= 0:
+        return False
+    overlap = min(a[3], b[3]) - max(a[1], b[1])
+    gap = max(a[0], b[0]) - min(a[2], b[2])
+    return overlap >= SAME_LINE_OVERLAP * height and gap <= ADJACENT_GAP_RATIO * height
+
+
+def _coalesce_rects(rects: list[Rect]) -> list[Rect]:
+    merged: list[Rect] = []
+    for rect in rects:
+        rect = tuple(pymupdf.Rect(rect).normalize())
+        if merged and _same_line_adjacent(merged[-1], rect):
+            last = merged[-1]
+            merged[-1] = (
+                min(last[0], rect[0]),
+                min(last[1], rect[1]),
+                max(last[2], rect[2]),
+                max(last[3], rect[3]),
+            )
+        else:
+            merged.append(rect)
+    return merged
+
+
+def _page_highlight_geometry(page: PageHighlights) -> PageHighlights:
+    return PageHighlights(
+        page_num=page.page_num,
+        annotations=[_coalesce_rects(rects) for rects in page.annotations],
+    )
+
+
+def _highlight_geometry_batch(batch: list[PageHighlights]) -> list[PageHighlights]:
+    return [_page_highlight_geometry(page) for page in batch]
+
+
+def compute_highlight_geometry(
+    span_groups: list[list[TextSpan]],
+    parallel: bool = True,
+) -> list[PageHighlights]:
+    annotations_by_page: dict[int, list[list[Rect]]] = defaultdict(list)
+    seen: set[TextSpan] = set()
+
+    for group in span_groups:
+        group_rects: dict[int, list[Rect]] = {}
+        for span in group:
+            if span in seen:
+                continue
+            seen.add(span)
+            rects = group_rects.get(span.page_num)
+            if rects is None:
+                rects = group_rects[span.page_num] = []
+                annotations_by_page[span.page_num].append(rects)
+            rects.append(span.bbox)
+
+    touched = [
+        PageHighlights(page_num=page_num, annotations=annotations_by_page[page_num])
+        for page_num in sorted(annotations_by_page)
+    ]
+
+    if not parallel or len(touched) < PARALLEL_GEOMETRY_MIN_PAGES:
+        return _highlight_geometry_batch(touched)
+
+    batches = [
+        touched[i : i + DEFAULT_CHUNK_SIZE]
+        for i in range(0, len(touched), DEFAULT_CHUNK_SIZE)
+    ]
+    geometry: list[PageHighlights] = []
+    for batch in map_in_pool(_highlight_geometry_batch, batches):
+        geometry.extend(batch)
+    return geometry
+
+
+def _highlight_key(rect: Rect, color: tuple[float, ...]) -> tuple:
+    return (
+        tuple(round(v, 1) for v in rect),
+        tuple(round(c, 3) for c in color),
+    )
+
+
+def _existing_highlights(page: pymupdf.Page) -> set[tuple]:
+    keys: set[tuple] = set()
+    for annot in page.annots(types=[pymupdf.PDF_ANNOT_HIGHLIGHT]):
+        points = annot.vertices or []
+        color = tuple(annot.colors.get("stroke") or ())
+        for i in range(0, len(points) - 3, 4):
+            rect = tuple(pymupdf.Quad(points[i : i + 4]).rect)
+            keys.add(_highlight_key(rect, color))
+    return keys
+
+
+def _apply_highlights(
+    doc: pymupdf.Document,
+    geometry: list[PageHighlights],
+    color: tuple[float, float, float],
+    skip_existing: bool = False,
+) -> int:
+    count = 0
+    for page_highlights in geometry:
+        if page_highlights.page_num >= len(doc):
+            continue
+
+        page = doc[page_highlights.page_num]
+        existing = _existing_highlights(page) if skip_existing else set()
+        for rects in page_highlights.annotations:
+            if existing:
+                rects = [
+                    rect
+                    for rect in rects
+                    if _highlight_key(rect, color) not in existing
+                ]
+                if not rects:
+                    continue
+            annot = page.add_highlight_annot(
+                quads=[pymupdf.Rect(rect).quad for rect in rects]
+            )
+            annot.set_colors(stroke=color)
+            annot.update()
+            count += 1
+    return count
+
+
+def _highlight_touched_pages(
     pdf_path: str | Path,
-    spans: list[TextSpan],
-    output_path: str | Path | None = None,
-    color: tuple[float, float, float] = (1, 1, 0),
+    span_groups: list[list[TextSpan]],
+    output_path: str | Path | None,
+    color: tuple[float, float, float],
+    save_mode: SaveMode,
+    parallel: bool,
 ) -> Path:
     pdf_path = Path(pdf_path)
     if output_path is None:
         output_path = pdf_path.with_stem(f"{pdf_path.stem}_highlighted")
     output_path = Path(output_path)
 
-    doc = pymupdf.open(str(pdf_path))
-    total_pages = len(doc)
-    doc.close()
+    with stage("highlight.geometry"):
+        geometry = compute_highlight_geometry(span_groups, parallel=parallel)
 
-    if total_pages <= DEFAULT_CHUNK_SIZE or len(spans) < 10:
-        return highlight_spans(pdf_path, spans, output_path, color)
-
-    spans_by_page: dict[int, list[TextSpan]] = defaultdict(list)
-    for span in spans:
-        spans_by_page[span.page_num].append(span)
-
-    page_ranges = get_page_ranges(pdf_path, total_pages)
-
-    temp_dir = tempfile.mkdtemp(prefix="highlight_")
-    tasks: list[HighlightTask] = []
-
-    for i, page_range in enumerate(page_ranges):
-        range_spans: list[TextSpan] = []
-        for page_num in range(page_range.start, page_range.end):
-            range_spans.extend(spans_by_page.get(page_num, []))
-
-        temp_path = os.path.join(temp_dir, f"part_{i:04d}.pdf")
-        task = HighlightTask(
-            pdf_path=str(pdf_path),
-            page_start=page_range.start,
-            page_end=page_range.end,
-            spans=range_spans,
-            color=color,
-            temp_path=temp_path,
+    with stage("highlight.apply"):
+        doc = _open_for_highlight(pdf_path, output_path, save_mode)
+        added = _apply_highlights(
+            doc, geometry, color, skip_existing=save_mode == "incremental"
         )
-        tasks.append(task)
-
-    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        temp_paths = list(executor.map(_highlight_page_range_worker, tasks))
+        count("annotations", added)
+    with stage("highlight.save"):
+        _save_highlighted(doc, output_path, save_mode)
 
-    final_doc = pymupdf.open()
-    for temp_path in temp_paths:
-        if os.path.exists(temp_path):
-            with pymupdf.open(temp_path) as part_doc:
-                final_doc.insert_pdf(part_doc)
-            os.remove(temp_path)
-
-    final_doc.save(str(output_path), garbage=4, deflate=True)
-    final_doc.close()
+    return output_path
 
-    try:
-        os.rmdir(temp_dir)
-    except OSError:
-        pass
 
-    return output_path
+def highlight_spans_parallel(
+    pdf_path: str | Path,
+    spans: list[TextSpan],
+    output_path: str | Path | None = None,
+    color: tuple[float, float, float] = (1, 1, 0),
+    save_mode: SaveMode = "rewrite",
+) -> Path:
+    return _highlight_touched_pages(
+        pdf_path,
+        [[span] for span in spans],
+        output_path,
+        color,
+        save_mode,
+        parallel=True,
+    )
 
 
 def highlight_text_in_pdf(
@@ -117,23 +265,30 @@ def highlight_text_in_pdf(
     search_text: str,
     output_path: str | Path | None = None,
     color: tuple[float, float, float] = (1, 1, 0),
+    save_mode: SaveMode = "rewrite",
 ) -> Path:
     pdf_path = Path(pdf_path)
     if output_path is None:
         output_path = pdf_path.with_stem(f"{pdf_path.stem}_highlighted")
     output_path = Path(output_path)
 
-    doc = pymupdf.open(str(pdf_path))
+    doc = _open_for_highlight(pdf_path, output_path, save_mode)
 
     for page in doc:
         quads = page.search_for(search_text, quads=True)
+        if save_mode == "incremental" and quads:
+            existing = _existing_highlights(page)
+            quads = [
+                quad
+                for quad in quads
+                if _highlight_key(tuple(quad.rect), color) not in existing
+            ]
         for quad in quads:
             annot = page.add_highlight_annot(quad)
             annot.set_colors(stroke=color)
             annot.update()
 
-    doc.save(str(output_path))
-    doc.close()
+    _save_highlighted(doc, output_path, save_mode)
 
     return output_path
 
@@ -143,28 +298,16 @@ def highlight_spans(
     spans: list[TextSpan],
     output_path: str | Path | None = None,
     color: tuple[float, float, float] = (1, 1, 0),
+    save_mode: SaveMode = "rewrite",
 ) -> Path:
-    pdf_path = Path(pdf_path)
-    if output_path is None:
-        output_path = pdf_path.with_stem(f"{pdf_path.stem}_highlighted")
-    output_path = Path(output_path)
-
-    doc = pymupdf.open(str(pdf_path))
-
-    for span in spans:
-        if span.page_num >= len(doc):
-            continue
-
-        page = doc[span.page_num]
-        rect = pymupdf.Rect(span.bbox)
-        annot = page.add_highlight_annot(rect)
-        annot.set_colors(stroke=color)
-        annot.update()
-
-    doc.save(str(output_path))
-    doc.close()
-
-    return output_path
+    return _highlight_touched_pages(
+        pdf_path,
+        [[span] for span in spans],
+        output_path,
+        color,
+        save_mode,
+        parallel=False,
+    )
 
 
 def highlight_sentences(
@@ -172,9 +315,13 @@ def highlight_sentences(
     sentences: list[Sentence],
     output_path: str | Path | None = None,
     color: tuple[float, float, float] = (1, 1, 0),
+    save_mode: SaveMode = "rewrite",
 ) -> Path:
-    all_spans: list[TextSpan] = []
-    for sentence in sentences:
-        all_spans.extend(sentence.spans)
-
-    return highlight_spans_parallel(pdf_path, all_spans, output_path, color)
+    return _highlight_touched_pages(
+        pdf_path,
+        [sentence.spans for sentence in sentences],
+        output_path,
+        color,
+        save_mode,
+        parallel=True,
+    )
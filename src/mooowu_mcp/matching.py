@@ -0,0 +1,93 @@
+from collections import Counter
+from dataclasses import dataclass
+import re
+import unicodedata
+
+from .pdf_reader import Sentence
+
+DEFAULT_MIN_SCORE = 0.8
+
+CHARACTER_FOLDS = str.maketrans(
+    {
+        "\u00ad": None,
+        "\u2018": "'",
+        "\u2019": "'",
+        "\u201c": '"',
+        "\u201d": '"',
+        "\u2010": "-",
+        "\u2011": "-",
+    }
+)
+HYPHENATION = re.compile(r"(\w)-\s+(\w)")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).translate(CHARACTER_FOLDS)
+    text = HYPHENATION.sub(r"\1\2", text)
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text.casefold()} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class SentenceMatch:
+    sentence: Sentence
+    score: float
+    exact: bool
+
+
+class SentenceIndex:
+    def __init__(
+        self,
+        sentences: list[Sentence],
+        min_score: float = DEFAULT_MIN_SCORE,
+    ):
+        self.sentences = sentences
+        self.min_score = min_score
+        self._by_key: dict[str, Sentence] = {}
+        for sentence in sentences:
+            self._by_key.setdefault(normalize_text(sentence.text), sentence)
+
+        self._trigram_sets: list[set[str]] | None = None
+        self._postings: dict[str, list[int]] = {}
+
+    def _build_trigram_index(self) -> list[set[str]]:
+        if self._trigram_sets is None:
+            self._trigram_sets = []
+            for i, sentence in enumerate(self.sentences):
+                grams = _trigrams(normalize_text(sentence.text))
+                self._trigram_sets.append(grams)
+                for gram in grams:
+                    self._postings.setdefault(gram, []).append(i)
+        return self._trigram_sets
+
+    def lookup(self, text: str) -> SentenceMatch | None:
+        key = normalize_text(text)
+        sentence = self._by_key.get(key)
+        if sentence is not None:
+            return SentenceMatch(sentence=sentence, score=1.0, exact=True)
+
+        if self.min_score >= 1.0 or not key:
+            return None
+
+        trigram_sets = self._build_trigram_index()
+        query = _trigrams(key)
+        shared: Counter[int] = Counter()
+        for gram in query:
+            shared.update(self._postings.get(gram, ()))
+
+        best: SentenceMatch | None = None
+        for i, count in shared.items():
+            score = 2 * count / (len(query) + len(trigram_sets[i]))
+            if score >= self.min_score and (best is None or score > best.score):
+                best = SentenceMatch(
+                    sentence=self.sentences[i],
+                    score=score,
+                    exact=False,
+                )
+
+        return best
@@ -0,0 +1,100 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+import base64
+import binascii
+import hashlib
+import json
+
+from .cache import file_key
+from .pdf_reader import Sentence
+
+CURSOR_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Cursor:
+    document: str
+    scope: str
+    page: int
+    index: int
+
+
+@dataclass
+class SentencePage:
+    sentences: list[Sentence]
+    start: int
+    next_cursor: str | None
+
+
+def document_fingerprint(pdf_path: str | Path) -> str:
+    key = file_key(pdf_path)
+    identity = f"{key.path}\0{key.mtime_ns}\0{key.size}".encode()
+    return hashlib.blake2b(identity, digest_size=8).hexdigest()
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    payload = json.dumps(
+        [CURSOR_VERSION, cursor.document, cursor.scope, cursor.page, cursor.index],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        version, document, scope, page, index = json.loads(
+            base64.urlsafe_b64decode(padded.encode())
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValueError("Invalid cursor") from None
+
+    if (
+        version != CURSOR_VERSION
+        or not isinstance(document, str)
+        or not isinstance(scope, str)
+        or not isinstance(page, int)
+        or not isinstance(index, int)
+        or page < 0
+        or index < 0
+    ):
+        raise ValueError("Invalid cursor")
+    return Cursor(document, scope, page, index)
+
+
+def _page_start(sentences: list[Sentence], page_num: int) -> int:
+    return bisect_left(sentences, page_num, key=lambda sentence: sentence.page_num)
+
+
+def paginate_sentences(
+    sentences: list[Sentence],
+    limit: int | None,
+    cursor: str | None,
+    document: str,
+    scope: str,
+) -> SentencePage:
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be at least 1")
+
+    start = 0
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        if position.document != document or position.scope != scope:
+            raise ValueError(
+                "Cursor does not match this document and selection; "
+                "restart without a cursor"
+            )
+        start = min(
+            _page_start(sentences, position.page) + position.index, len(sentences)
+        )
+
+    end = len(sentences) if limit is None else min(start + limit, len(sentences))
+    next_cursor = None
+    if end < len(sentences):
+        page_num = sentences[end].page_num
+        next_cursor = encode_cursor(
+            Cursor(document, scope, page_num, end - _page_start(sentences, page_num))
+        )
+
+    return SentencePage(sentences[start:end], start, next_cursor)
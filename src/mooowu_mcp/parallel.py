@@ -1,13 +1,47 @@
-from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Callable, TypeVar
+from typing import Any, Callable, Iterator, TypeVar
+import atexit
 import os
+import pickle
+import re
+import threading
+import time
+import pymupdf
+
+from .cache import FileKey, file_key
+from .timing import (
+    ChunkTiming,
+    Timings,
+    active_timings,
+    collect_timings,
+    count,
+    stage,
+)
 
 T = TypeVar("T")
 
 DEFAULT_CHUNK_SIZE = 10
 MAX_WORKERS = min(8, os.cpu_count() or 4)
+BATCHES_PER_WORKER = 4
+BASE_PAGE_COST = 2048
+IMAGE_PAGE_COST = 16384
+PDF_REFERENCE = re.compile(r"(\d+) \d+ R")
+STREAM_LENGTH = re.compile(r"/Length (\d+)(?! \d+ R)")
+WORKER_DOCUMENT_CACHE_SIZE = 4
+PAGE_COST_CACHE_SIZE = 16
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_in_worker = False
+_worker_documents: OrderedDict[FileKey, pymupdf.Document] = OrderedDict()
+_page_costs: OrderedDict[FileKey, dict[int, float]] = OrderedDict()
+_page_costs_lock = threading.Lock()
 
 
 @dataclass
@@ -15,34 +49,348 @@ class PageRange:
     start: int
     end: int
     pdf_path: str
+    cost: float = 0.0
+
+
+def _init_worker() -> None:
+    global _in_worker
+    _in_worker = True
+
+
+def _cached_document(pdf_path: str | Path) -> pymupdf.Document:
+    key = file_key(pdf_path)
+    doc = _worker_documents.get(key)
+    if doc is not None:
+        _worker_documents.move_to_end(key)
+        count("worker.document_reuses")
+        return doc
+
+    with stage("worker.open"):
+        doc = pymupdf.open(key.path)
+    _worker_documents[key] = doc
+    while len(_worker_documents) > WORKER_DOCUMENT_CACHE_SIZE:
+        _, evicted = _worker_documents.popitem(last=False)
+        evicted.close()
+    return doc
+
+
+@contextmanager
+def open_document(pdf_path: str | Path) -> Iterator[pymupdf.Document]:
+    if _in_worker:
+        yield _cached_document(pdf_path)
+        return
+
+    with stage("worker.open"):
+        doc = pymupdf.open(str(pdf_path))
+    try:
+        yield doc
+    finally:
+        doc.close()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS,
+                initializer=_init_worker,
+            )
+        return _executor
+
+
+def warm_pool() -> None:
+    executor = get_executor()
+    futures = [executor.submit(_ping) for _ in range(MAX_WORKERS)]
+    for future in futures:
+        future.result()
+
+
+def shutdown_pool() -> None:
+    global _executor
+    with _executor_lock:
+        executor = _executor
+        _executor = None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _discard_broken_pool(executor: ProcessPoolExecutor) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_pool)
+
+
+def _timed_call(
+    func: Callable[..., Any],
+    item: Any,
+    submitted_at: float,
+) -> tuple[bytes, float, float, Timings]:
+    started = time.time()
+    with collect_timings() as timings:
+        result = func(item)
+    run = time.time() - started
+    payload = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+    return payload, started - submitted_at, run, timings
+
+
+def _map_timed(
+    executor: ProcessPoolExecutor,
+    func: Callable[..., T],
+    items: list,
+    timings: Timings,
+) -> list[T]:
+    submitted_at = time.time()
+    responses = executor.map(
+        partial(_timed_call, func), items, [submitted_at] * len(items)
+    )
+
+    results: list[T] = []
+    for index, (item, response) in enumerate(zip(items, responses)):
+        payload, queue_wait, run, worker_timings = response
+        started = time.perf_counter()
+        results.append(pickle.loads(payload))
+        decode = time.perf_counter() - started
+
+        timings.merge(worker_timings)
+        timings.count("bytes_pickled", len(payload))
+        timings.chunks.append(
+            ChunkTiming(
+                index=index,
+                page_start=getattr(item, "start", None),
+                page_end=getattr(item, "end", None),
+                queue_wait=queue_wait,
+                run=run,
+                decode=decode,
+                result_bytes=len(payload),
+            )
+        )
+    return results
+
+
+def map_in_pool(func: Callable[..., T], items: list) -> list[T]:
+    executor = get_executor()
+    timings = active_timings()
+    try:
+        if timings is None:
+            return list(executor.map(func, items))
+        with stage("dispatch"):
+            return _map_timed(executor, func, items, timings)
+    except BrokenProcessPool:
+        _discard_broken_pool(executor)
+        raise
+
+
+def _contiguous_runs(pages: list[int]) -> list[tuple[int, int]]:
+    runs: list[tuple[int, int]] = []
+    for page in pages:
+        if runs and runs[-1][1] == page:
+            runs[-1] = (runs[-1][0], page + 1)
+        else:
+            runs.append((page, page + 1))
+    return runs
+
+
+def _content_length(doc: pymupdf.Document, page_xref: int) -> int:
+    _, contents = doc.xref_get_key(page_xref, "Contents")
+    length = 0
+    for ref in PDF_REFERENCE.findall(contents):
+        match = STREAM_LENGTH.search(doc.xref_object(int(ref), compressed=True))
+        length += int(match.group(1)) if match else BASE_PAGE_COST
+    return length
+
 
+def _image_count(doc: pymupdf.Document, page_num: int, page_xref: int) -> int:
+    kind, xobjects = doc.xref_get_key(page_xref, "Resources/XObject")
+    if kind == "null":
+        return len(doc.get_page_images(page_num))
+    if kind == "xref":
+        xobjects = doc.xref_object(int(xobjects.split()[0]), compressed=True)
+    return len(PDF_REFERENCE.findall(xobjects))
 
-def get_page_ranges(pdf_path: str | Path, total_pages: int) -> list[PageRange]:
+
+def _estimate_costs(doc: pymupdf.Document, page_nums: Any) -> dict[int, float]:
+    costs: dict[int, float] = {}
+    for page_num in page_nums:
+        page_xref = doc.page_xref(page_num)
+        costs[page_num] = (
+            BASE_PAGE_COST
+            + _content_length(doc, page_xref)
+            + IMAGE_PAGE_COST * _image_count(doc, page_num, page_xref)
+        )
+    return costs
+
+
+def estimate_page_costs(
+    pdf_path: str | Path,
+    pages: list[int] | None = None,
+) -> dict[int, float]:
+    key = file_key(pdf_path)
+    with _page_costs_lock:
+        known = _page_costs.get(key, {})
+        if known:
+            _page_costs.move_to_end(key)
+
+    doc = None
+    try:
+        if pages is None:
+            doc = pymupdf.open(key.path)
+            pages = list(range(len(doc)))
+        missing = [page for page in pages if page not in known]
+        if missing:
+            if doc is None:
+                doc = pymupdf.open(key.path)
+            known = {**known, **_estimate_costs(doc, missing)}
+            with _page_costs_lock:
+                _page_costs[key] = known
+                while len(_page_costs) > PAGE_COST_CACHE_SIZE:
+                    _page_costs.popitem(last=False)
+    finally:
+        if doc is not None:
+            doc.close()
+
+    return {page: known[page] for page in pages}
+
+
+def _balancing_costs(
+    pdf_path: str | Path,
+    total_pages: int,
+    pages: list[int] | None,
+) -> dict[int, float] | None:
+    page_count = total_pages if pages is None else len(pages)
+    if MAX_WORKERS < 2 or page_count <= MAX_WORKERS * DEFAULT_CHUNK_SIZE:
+        return None
+    with stage("estimate_costs"):
+        return estimate_page_costs(
+            pdf_path, list(range(total_pages)) if pages is None else pages
+        )
+
+
+def _cost_balanced_ranges(
+    runs: list[tuple[int, int]],
+    costs: dict[int, float],
+    pdf_path: str,
+) -> list[PageRange]:
+    total_cost = sum(
+        costs.get(page, BASE_PAGE_COST)
+        for run_start, run_end in runs
+        for page in range(run_start, run_end)
+    )
+    target = total_cost / (MAX_WORKERS * BATCHES_PER_WORKER)
+
+    ranges: list[PageRange] = []
+    for run_start, run_end in runs:
+        start = run_start
+        cost = 0.0
+        for page in range(run_start, run_end):
+            cost += costs.get(page, BASE_PAGE_COST)
+            if cost >= target or page + 1 - start >= DEFAULT_CHUNK_SIZE:
+                ranges.append(PageRange(start, page + 1, pdf_path, cost))
+                start = page + 1
+                cost = 0.0
+        if start < run_end:
+            ranges.append(PageRange(start, run_end, pdf_path, cost))
+
+    return ranges
+
+
+def get_page_ranges(
+    pdf_path: str | Path,
+    total_pages: int,
+    pages: list[int] | None = None,
+    costs: dict[int, float] | None = None,
+) -> list[PageRange]:
     pdf_path_str = str(pdf_path)
-    chunk_size = max(1, total_pages // MAX_WORKERS)
+    runs = [(0, total_pages)] if pages is None else _contiguous_runs(pages)
+    if costs is not None:
+        return _cost_balanced_ranges(runs, costs, pdf_path_str)
+
+    page_count = total_pages if pages is None else len(pages)
+    chunk_size = max(1, page_count // MAX_WORKERS)
     chunk_size = min(chunk_size, DEFAULT_CHUNK_SIZE)
 
     ranges: list[PageRange] = []
-    for start in range(0, total_pages, chunk_size):
-        end = min(start + chunk_size, total_pages)
-        ranges.append(PageRange(start=start, end=end, pdf_path=pdf_path_str))
+    for run_start, run_end in runs:
+        for start in range(run_start, run_end, chunk_size):
+            end = min(start + chunk_size, run_end)
+            ranges.append(PageRange(start=start, end=end, pdf_path=pdf_path_str))
 
     return ranges
 
 
-def process_pages_parallel(
+def _run_in_process(
     pdf_path: str | Path,
     total_pages: int,
     worker_func: Callable[[PageRange], list[T]],
+    pages: list[int] | None,
 ) -> list[T]:
-    if total_pages <= DEFAULT_CHUNK_SIZE:
+    if pages is None:
         return worker_func(PageRange(0, total_pages, str(pdf_path)))
 
-    ranges = get_page_ranges(pdf_path, total_pages)
+    results: list[T] = []
+    for start, end in _contiguous_runs(pages):
+        results.extend(worker_func(PageRange(start, end, str(pdf_path))))
+    return results
+
+
+def process_pages_parallel(
+    pdf_path: str | Path,
+    total_pages: int,
+    worker_func: Callable[[PageRange], list[T]],
+    pages: list[int] | None = None,
+) -> list[T]:
+    page_count = total_pages if pages is None else len(pages)
+    if page_count <= DEFAULT_CHUNK_SIZE:
+        return _run_in_process(pdf_path, total_pages, worker_func, pages)
+
+    costs = _balancing_costs(pdf_path, total_pages, pages)
+    ranges = get_page_ranges(pdf_path, total_pages, pages, costs)
+    order = sorted(range(len(ranges)), key=lambda i: ranges[i].cost, reverse=True)
+    chunks = dict(zip(order, map_in_pool(worker_func, [ranges[i] for i in order])))
 
     results: list[T] = []
-    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        for chunk_results in executor.map(worker_func, ranges):
-            results.extend(chunk_results)
+    for index in range(len(ranges)):
+        results.extend(chunks[index])
 
     return results
+
+
+def submit_pages_parallel(
+    pdf_path: str | Path,
+    total_pages: int,
+    worker_func: Callable[[PageRange], list[T]],
+    pages: list[int] | None = None,
+) -> list[tuple[PageRange, Future]]:
+    page_count = total_pages if pages is None else len(pages)
+    if page_count <= DEFAULT_CHUNK_SIZE:
+        first = 0 if pages is None else pages[0]
+        last = total_pages if pages is None else pages[-1] + 1
+        page_range = PageRange(first, last, str(pdf_path))
+        future: Future = Future()
+        try:
+            future.set_result(
+                _run_in_process(pdf_path, total_pages, worker_func, pages)
+            )
+        except Exception as exc:
+            future.set_exception(exc)
+        return [(page_range, future)]
+
+    costs = _balancing_costs(pdf_path, total_pages, pages)
+    executor = get_executor()
+    try:
+        return [
+            (page_range, executor.submit(worker_func, page_range))
+            for page_range in get_page_ranges(pdf_path, total_pages, pages, costs)
+        ]
+    except BrokenProcessPool:
+        _discard_broken_pool(executor)
+        raise
@@ -1,10 +1,24 @@
-from dataclasses import dataclass
+from array import array
+from concurrent.futures import Future
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, cast
+from typing import Any
 import re
+import struct
+import sys
 import pymupdf
 
-from .parallel import PageRange, process_pages_parallel
+from .cache import get_extraction_cache
+from .fonts import FontInfo, FontRegistry
+from .parallel import (
+    PageRange,
+    open_document,
+    process_pages_parallel,
+    submit_pages_parallel,
+)
+from .selection import format_page_selection
+from .store import StoredDocument, get_extraction_store
+from .timing import count, stage
 
 
 def _make_bbox(bbox_list: Any) -> tuple[float, float, float, float]:
@@ -16,16 +30,221 @@ def _make_bbox(bbox_list: Any) -> tuple[float, float, float, float]:
     )
 
 
-@dataclass
+SPAN_VIEW_BYTES = 56
+BLOCK_BYTES = 192
+SENTENCE_BYTES = 128
+IMAGE_REGION_BYTES = 128
+
+
+class SpanTable:
+    __slots__ = (
+        "_text",
+        "_pending",
+        "offsets",
+        "coords",
+        "sizes",
+        "pages",
+        "font_ids",
+        "fonts",
+        "_views",
+    )
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._pending: list[str] = []
+        self.offsets = array("I", [0])
+        self.coords = array("d")
+        self.sizes = array("d")
+        self.pages = array("i")
+        self.font_ids = array("I")
+        self.fonts = FontRegistry()
+        self._views: list[TextSpan | None] = []
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def __getitem__(self, index: int) -> "TextSpan":
+        if not 0 <= index < len(self.pages):
+            raise IndexError(index)
+        if len(self._views) < len(self.pages):
+            self._views.extend([None] * (len(self.pages) - len(self._views)))
+        view = self._views[index]
+        if view is None:
+            view = self._views[index] = TextSpan._view(self, index)
+        return view
+
+    def spans(self, start: int, end: int) -> list["TextSpan"]:
+        views = self._views
+        if len(views) < len(self.pages):
+            views.extend([None] * (len(self.pages) - len(views)))
+        result = views[start:end]
+        for offset, view in enumerate(result):
+            if view is None:
+                result[offset] = views[start + offset] = TextSpan._view(
+                    self, start + offset
+                )
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.offsets, self.coords, self.sizes, self.pages, self.font_ids)
+        return (
+            sys.getsizeof(self.text)
+            + sum(sys.getsizeof(column) for column in arrays)
+            + sum(sys.getsizeof(name) for name in self.fonts.names)
+            + SPAN_VIEW_BYTES * len(self.pages)
+        )
+
+    @property
+    def text(self) -> str:
+        if self._pending:
+            self._text += "".join(self._pending)
+            self._pending.clear()
+        return self._text
+
+    def intern_font(self, font: str, flags: int = 0) -> int:
+        return self.fonts.intern(font, flags)
+
+    def append(
+        self,
+        text: str,
+        bbox: Any,
+        font: str,
+        size: float,
+        page_num: int,
+        flags: int = 0,
+    ) -> "TextSpan":
+        index = len(self.pages)
+        self._pending.append(text)
+        self.offsets.append(self.offsets[-1] + len(text))
+        self.coords.extend(
+            (float(bbox[0]), float(bbox[1]), float(bbox[2]), float(bbox[3]))
+        )
+        self.sizes.append(float(size))
+        self.pages.append(page_num)
+        self.font_ids.append(self.intern_font(font, flags))
+        return self[index]
+
+    def __getstate__(self) -> tuple:
+        return (
+            self.text,
+            self.offsets,
+            self.coords,
+            self.sizes,
+            self.pages,
+            self.font_ids,
+            self.fonts,
+        )
+
+    def __setstate__(self, state: tuple) -> None:
+        (
+            self._text,
+            self.offsets,
+            self.coords,
+            self.sizes,
+            self.pages,
+            self.font_ids,
+            self.fonts,
+        ) = state
+        self._pending = []
+        self._views = []
+
+
+def _span_run(spans: list["TextSpan"]) -> tuple[SpanTable, int, int] | None:
+    if not spans:
+        return None
+    table = spans[0]._table
+    start = spans[0]._index
+    for offset, span in enumerate(spans):
+        if span._table is not table or span._index != start + offset:
+            return None
+    return table, start, start + len(spans)
+
+
 class TextSpan:
-    text: str
-    bbox: tuple[float, float, float, float]
-    font: str
-    size: float
-    page_num: int
+    __slots__ = ("_table", "_index")
+
+    def __init__(
+        self,
+        text: str,
+        bbox: tuple[float, float, float, float],
+        font: str,
+        size: float,
+        page_num: int,
+        flags: int = 0,
+    ):
+        table = SpanTable()
+        table.append(text, bbox, font, size, page_num, flags)
+        table._views[0] = self
+        self._table = table
+        self._index = 0
+
+    @classmethod
+    def _view(cls, table: SpanTable, index: int) -> "TextSpan":
+        span = cls.__new__(cls)
+        span._table = table
+        span._index = index
+        return span
+
+    @property
+    def text(self) -> str:
+        offsets = self._table.offsets
+        return self._table.text[offsets[self._index] : offsets[self._index + 1]]
 
+    @property
+    def bbox(self) -> tuple[float, float, float, float]:
+        i = self._index * 4
+        coords = self._table.coords
+        return (coords[i], coords[i + 1], coords[i + 2], coords[i + 3])
+
+    @property
+    def font(self) -> str:
+        return self._table.fonts.names[self._table.font_ids[self._index]]
+
+    @property
+    def font_id(self) -> int:
+        return self._table.font_ids[self._index]
+
+    @property
+    def font_info(self) -> FontInfo:
+        return self._table.fonts.info(self._table.font_ids[self._index])
+
+    @property
+    def is_code(self) -> bool:
+        return self._table.fonts.code_mask()[self._table.font_ids[self._index]]
+
+    @property
+    def size(self) -> float:
+        return self._table.sizes[self._index]
+
+    @property
+    def page_num(self) -> int:
+        return self._table.pages[self._index]
+
+    def __reduce__(self) -> tuple:
+        return (self._table.__getitem__, (self._index,))
+
+    def _key(self) -> tuple:
+        return (self.text, self.bbox, self.font, self.size, self.page_num)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TextSpan):
+            return NotImplemented
+        if self._table is other._table and self._index == other._index:
+            return True
+        return self._key() == other._key()
 
-@dataclass
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return (
+            f"TextSpan(text={self.text!r}, bbox={self.bbox!r}, font={self.font!r}, "
+            f"size={self.size!r}, page_num={self.page_num!r})"
+        )
+
+
+@dataclass(slots=True)
 class TextBlock:
     spans: list[TextSpan]
     bbox: tuple[float, float, float, float]
@@ -35,113 +254,279 @@ class TextBlock:
     def text(self) -> str:
         return " ".join(span.text for span in self.spans)
 
+    def __reduce__(self) -> tuple:
+        run = _span_run(self.spans)
+        if run is None:
+            return (TextBlock, (self.spans, self.bbox, self.page_num))
+        return (_block_from_run, (*run, self.bbox, self.page_num))
 
-def _extract_blocks_from_page_range(page_range: PageRange) -> list[TextBlock]:
-    doc = pymupdf.open(page_range.pdf_path)
-    blocks: list[TextBlock] = []
 
-    for page_num in range(page_range.start, page_range.end):
-        if page_num >= len(doc):
-            break
+@dataclass(slots=True)
+class Sentence:
+    text: str
+    spans: list[TextSpan]
+    page_num: int
+    _bbox: tuple[float, float, float, float] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
-        page = doc[page_num]
-        page_dict: Any = page.get_text("dict")
+    @property
+    def bbox(self) -> tuple[float, float, float, float]:
+        if self._bbox is None:
+            if not self.spans:
+                self._bbox = (0, 0, 0, 0)
+            else:
+                boxes = [s.bbox for s in self.spans]
+                self._bbox = (
+                    min(b[0] for b in boxes),
+                    min(b[1] for b in boxes),
+                    max(b[2] for b in boxes),
+                    max(b[3] for b in boxes),
+                )
+        return self._bbox
 
-        for block in page_dict["blocks"]:
-            if block.get("type") != 0:
-                continue
+    def __reduce__(self) -> tuple:
+        run = _span_run(self.spans)
+        if run is None:
+            return (Sentence, (self.text, self.spans, self.page_num))
+        return (_sentence_from_run, (*run, self.text, self.page_num))
 
-            block_spans: list[TextSpan] = []
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    if not span.get("text", "").strip():
-                        continue
 
-                    text_span = TextSpan(
-                        text=span["text"],
-                        bbox=_make_bbox(span["bbox"]),
-                        font=span.get("font", ""),
-                        size=span.get("size", 0.0),
-                        page_num=page_num,
-                    )
-                    block_spans.append(text_span)
+def _block_from_run(
+    table: SpanTable,
+    start: int,
+    end: int,
+    bbox: tuple[float, float, float, float],
+    page_num: int,
+) -> TextBlock:
+    return TextBlock(spans=table.spans(start, end), bbox=bbox, page_num=page_num)
 
-            if block_spans:
-                text_block = TextBlock(
-                    spans=block_spans,
-                    bbox=_make_bbox(block["bbox"]),
-                    page_num=page_num,
-                )
-                blocks.append(text_block)
 
-    doc.close()
-    return blocks
+def _sentence_from_run(
+    table: SpanTable,
+    start: int,
+    end: int,
+    text: str,
+    page_num: int,
+) -> Sentence:
+    return Sentence(text=text, spans=table.spans(start, end), page_num=page_num)
 
 
-def extract_text_blocks(pdf_path: str | Path) -> list[TextBlock]:
-    doc = pymupdf.open(str(pdf_path))
-    total_pages = len(doc)
-    doc.close()
+@dataclass(slots=True)
+class ImageRegion:
+    bbox: tuple[float, float, float, float]
+    page_num: int
 
-    return process_pages_parallel(
-        pdf_path,
-        total_pages,
-        _extract_blocks_from_page_range,
+
+def _span_tables(items: list[TextBlock] | list[Sentence]) -> dict[int, SpanTable]:
+    tables: dict[int, SpanTable] = {}
+    for item in items:
+        if item.spans:
+            table = item.spans[0]._table
+            tables[id(table)] = table
+    return tables
+
+
+def _sentence_overhead(sentences: list[Sentence]) -> int:
+    return sum(
+        SENTENCE_BYTES + sys.getsizeof(sentence.text) + 8 * len(sentence.spans)
+        for sentence in sentences
     )
 
 
-def extract_all_spans(pdf_path: str | Path) -> list[TextSpan]:
-    blocks = extract_text_blocks(pdf_path)
-    spans: list[TextSpan] = []
+def sentences_nbytes(sentences: list[Sentence]) -> int:
+    tables = _span_tables(sentences)
+    return sum(t.nbytes for t in tables.values()) + _sentence_overhead(sentences)
+
+
+def _used_fonts(blocks: list[TextBlock]) -> FontRegistry:
+    fonts = FontRegistry()
+    seen: set[tuple[int, int]] = set()
     for block in blocks:
-        spans.extend(block.spans)
-    return spans
+        for span in block.spans:
+            table = span._table
+            font_id = table.font_ids[span._index]
+            if (id(table), font_id) not in seen:
+                seen.add((id(table), font_id))
+                fonts.intern(table.fonts.names[font_id], table.fonts.flags[font_id])
+    return fonts
 
 
-@dataclass
-class Sentence:
-    text: str
-    spans: list[TextSpan]
+@dataclass(slots=True)
+class PageContent:
     page_num: int
+    blocks: list[TextBlock] = field(default_factory=list)
+    sentences: list[Sentence] = field(default_factory=list)
+    images: list[ImageRegion] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class DocumentContent:
+    page_count: int
+    blocks: list[TextBlock] = field(default_factory=list)
+    sentences: list[Sentence] = field(default_factory=list)
+    images: list[ImageRegion] = field(default_factory=list)
+    selected_pages: list[int] | None = None
+    fonts: FontRegistry = field(default_factory=FontRegistry)
 
     @property
-    def bbox(self) -> tuple[float, float, float, float]:
-        if not self.spans:
-            return (0, 0, 0, 0)
-        x0 = min(s.bbox[0] for s in self.spans)
-        y0 = min(s.bbox[1] for s in self.spans)
-        x1 = max(s.bbox[2] for s in self.spans)
-        y1 = max(s.bbox[3] for s in self.spans)
-        return (x0, y0, x1, y1)
+    def spans(self) -> list[TextSpan]:
+        spans: list[TextSpan] = []
+        for block in self.blocks:
+            spans.extend(block.spans)
+        return spans
+
+    @property
+    def nbytes(self) -> int:
+        tables = _span_tables(self.blocks)
+        tables.update(_span_tables(self.sentences))
+        total = sum(table.nbytes for table in tables.values())
+        for block in self.blocks:
+            total += BLOCK_BYTES + 8 * len(block.spans)
+        total += _sentence_overhead(self.sentences)
+        return total + IMAGE_REGION_BYTES * len(self.images)
+
+    def subset(self, pages: list[int]) -> "DocumentContent":
+        wanted = set(pages)
+        blocks = [b for b in self.blocks if b.page_num in wanted]
+        return DocumentContent(
+            page_count=self.page_count,
+            blocks=blocks,
+            sentences=[s for s in self.sentences if s.page_num in wanted],
+            images=[i for i in self.images if i.page_num in wanted],
+            selected_pages=list(pages),
+            fonts=_used_fonts(blocks),
+        )
 
 
-SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+SENTENCE_TERMINATORS = frozenset(".!?")
+CLOSING_PUNCTUATION = frozenset("\"')]}\u201d\u2019")
+ABBREVIATIONS = frozenset(
+    [
+        "al",
+        "approx",
+        "cf",
+        "ch",
+        "dr",
+        "e.g",
+        "eq",
+        "etc",
+        "fig",
+        "figs",
+        "i.e",
+        "mr",
+        "mrs",
+        "ms",
+        "p",
+        "pp",
+        "prof",
+        "ref",
+        "refs",
+        "sec",
+        "tab",
+        "vol",
+        "vs",
+    ]
+)
+
+
+def _is_abbreviation(text: str, dot_index: int) -> bool:
+    start = dot_index
+    while start > 0 and not text[start - 1].isspace():
+        start -= 1
+
+    token = text[start:dot_index].lstrip("(\"'[").lower()
+    if token in ABBREVIATIONS:
+        return True
+    if len(token) == 1 and token.isalpha():
+        return True
+    parts = token.split(".")
+    return len(parts) > 1 and all(
+        len(part) == 1 and part.isalpha() for part in parts
+    )
+
+
+def _is_decimal_point(text: str, dot_index: int, next_index: int) -> bool:
+    if dot_index == 0 or not text[dot_index - 1].isdigit():
+        return False
+    while next_index < len(text) and text[next_index].isspace():
+        next_index += 1
+    return next_index < len(text) and text[next_index].isdigit()
+
+
+def _sentence_boundaries(text: str) -> list[tuple[int, int]]:
+    boundaries: list[tuple[int, int]] = []
+    length = len(text)
+    sent_start = 0
+    i = 0
+
+    while i < length:
+        if text[i] not in SENTENCE_TERMINATORS:
+            i += 1
+            continue
+
+        last_terminator = i
+        j = i + 1
+        while j < length and text[j] in SENTENCE_TERMINATORS:
+            last_terminator = j
+            j += 1
+        while j < length and text[j] in CLOSING_PUNCTUATION:
+            j += 1
+
+        if j < length and not text[j].isspace():
+            i = j
+            continue
+
+        if text[last_terminator] == "." and last_terminator == i:
+            if _is_abbreviation(text, i) or _is_decimal_point(text, i, j):
+                i = j
+                continue
+
+        boundaries.append((sent_start, j))
+        sent_start = j
+        i = j
+
+    if sent_start < length:
+        boundaries.append((sent_start, length))
+
+    return boundaries
 
 
 def _split_block_to_sentences(block: TextBlock) -> list[Sentence]:
     if not block.spans:
         return []
 
-    sentences: list[Sentence] = []
-    block_text = " ".join(span.text for span in block.spans)
-    sentence_texts = SENTENCE_BOUNDARY.split(block_text)
+    span_starts: list[int] = []
+    span_ends: list[int] = []
+    offset = 0
+    for span in block.spans:
+        span_starts.append(offset)
+        offset += len(span.text)
+        span_ends.append(offset)
+        offset += 1
 
-    for sent_text in sentence_texts:
-        sent_text = sent_text.strip()
-        if not sent_text:
+    block_text = " ".join(span.text for span in block.spans)
+    sentences: list[Sentence] = []
+    first_span = 0
+
+    for start, end in _sentence_boundaries(block_text):
+        while start < end and block_text[start].isspace():
+            start += 1
+        while end > start and block_text[end - 1].isspace():
+            end -= 1
+        if start == end:
             continue
 
-        sent_spans: list[TextSpan] = []
-        for span in block.spans:
-            if sent_text in span.text or span.text in sent_text:
-                sent_spans.append(span)
+        while span_ends[first_span] <= start:
+            first_span += 1
 
-        if not sent_spans:
-            sent_spans = list(block.spans)
+        last_span = first_span
+        while last_span < len(block.spans) and span_starts[last_span] < end:
+            last_span += 1
 
         sentence = Sentence(
-            text=sent_text,
-            spans=sent_spans,
+            text=block_text[start:end],
+            spans=block.spans[first_span:last_span],
             page_num=block.page_num,
         )
         sentences.append(sentence)
@@ -149,17 +534,46 @@ def _split_block_to_sentences(block: TextBlock) -> list[Sentence]:
     return sentences
 
 
-def _extract_sentences_from_page_range(page_range: PageRange) -> list[Sentence]:
-    doc = pymupdf.open(page_range.pdf_path)
-    sentences: list[Sentence] = []
-
-    for page_num in range(page_range.start, page_range.end):
-        if page_num >= len(doc):
-            break
-
-        page = doc[page_num]
-        page_dict: Any = page.get_text("dict")
-
+TEXT_FLAGS = (
+    pymupdf.TEXT_PRESERVE_LIGATURES
+    | pymupdf.TEXT_PRESERVE_WHITESPACE
+    | pymupdf.TEXT_MEDIABOX_CLIP
+    | pymupdf.TEXT_CID_FOR_UNKNOWN_UNICODE
+)
+TEXT_WITH_IMAGES_FLAGS = TEXT_FLAGS | pymupdf.TEXT_PRESERVE_IMAGES
+INLINE_IMAGE_PIXELS = 128 * 128
+IMAGE_BLOCK = 1
+IMAGE_SIZE = re.compile(r"width: (\d+), height: (\d+)")
+
+
+def _image_block_pixels(description: str) -> int:
+    size = IMAGE_SIZE.search(description)
+    if size is None:
+        return INLINE_IMAGE_PIXELS + 1
+    return int(size.group(1)) * int(size.group(2))
+
+
+def _read_page(page: Any, page_num: int) -> tuple[Any, list[ImageRegion]]:
+    text_page = page.get_textpage(flags=TEXT_WITH_IMAGES_FLAGS)
+    image_blocks = [
+        block for block in text_page.extractBLOCKS() if block[6] == IMAGE_BLOCK
+    ]
+    images = [
+        ImageRegion(bbox=_make_bbox(block[:4]), page_num=page_num)
+        for block in image_blocks
+    ]
+    pixels = [_image_block_pixels(block[4]) for block in image_blocks]
+    if any(size > INLINE_IMAGE_PIXELS for size in pixels):
+        text_page = page.get_textpage(flags=TEXT_FLAGS)
+    return text_page.extractDICT(), images
+
+
+def _visit_page(page: Any, page_num: int, table: SpanTable) -> PageContent:
+    content = PageContent(page_num=page_num)
+    with stage("worker.get_text"):
+        page_dict, content.images = _read_page(page, page_num)
+
+    with stage("worker.spans"):
         for block in page_dict["blocks"]:
             if block.get("type") != 0:
                 continue
@@ -170,34 +584,417 @@ def _extract_sentences_from_page_range(page_range: PageRange) -> list[Sentence]:
                     if not span.get("text", "").strip():
                         continue
 
-                    text_span = TextSpan(
-                        text=span["text"],
-                        bbox=_make_bbox(span["bbox"]),
-                        font=span.get("font", ""),
-                        size=span.get("size", 0.0),
-                        page_num=page_num,
+                    text_span = table.append(
+                        span["text"],
+                        span["bbox"],
+                        span.get("font", ""),
+                        span.get("size", 0.0),
+                        page_num,
+                        span.get("flags", 0),
                     )
                     block_spans.append(text_span)
 
             if block_spans:
-                text_block = TextBlock(
-                    spans=block_spans,
-                    bbox=_make_bbox(block["bbox"]),
-                    page_num=page_num,
+                content.blocks.append(
+                    TextBlock(
+                        spans=block_spans,
+                        bbox=_make_bbox(block["bbox"]),
+                        page_num=page_num,
+                    )
                 )
-                sentences.extend(_split_block_to_sentences(text_block))
 
-    doc.close()
-    return sentences
+    with stage("worker.segment"):
+        for text_block in content.blocks:
+            content.sentences.extend(_split_block_to_sentences(text_block))
+
+    return content
+
+
+def _extract_content_from_page_range(page_range: PageRange) -> list[PageContent]:
+    table = SpanTable()
+    pages: list[PageContent] = []
+
+    with open_document(page_range.pdf_path) as doc:
+        for page_num in range(page_range.start, page_range.end):
+            if page_num >= len(doc):
+                break
+            pages.append(_visit_page(doc[page_num], page_num, table))
 
+    count("pages", len(pages))
+    count("spans", len(table))
+    return pages
+
+
+PACKED_MAGIC = b"MWPK"
+PACKED_VERSION = 2
+EXTRACTION_VERSION = 2
+_PACKED_HEADER = struct.Struct("<4sH7I")
+
+
+def _packed_run(spans: list[TextSpan], table: SpanTable) -> tuple[int, int]:
+    if not spans:
+        return 0, 0
+    run = _span_run(spans)
+    if run is None or run[0] is not table:
+        raise ValueError("Packed pages require spans from a single span table")
+    return run[1], run[2]
+
+
+def pack_pages(pages: list[PageContent]) -> bytes:
+    table = next(
+        (block.spans[0]._table for page in pages for block in page.blocks),
+        SpanTable(),
+    )
+
+    block_runs = array("i")
+    block_boxes = array("d")
+    sentence_runs = array("i")
+    sentence_offsets = array("I", [0])
+    sentence_texts: list[str] = []
+    image_pages = array("i")
+    image_boxes = array("d")
+
+    for page in pages:
+        for block in page.blocks:
+            start, end = _packed_run(block.spans, table)
+            block_runs.extend((start, end, block.page_num))
+            block_boxes.extend(block.bbox)
+        for sentence in page.sentences:
+            start, end = _packed_run(sentence.spans, table)
+            sentence_runs.extend((start, end, sentence.page_num))
+            sentence_texts.append(sentence.text)
+            sentence_offsets.append(sentence_offsets[-1] + len(sentence.text))
+        for image in page.images:
+            image_pages.append(image.page_num)
+            image_boxes.extend(image.bbox)
+
+    page_nums = array("i", [page.page_num for page in pages])
+    span_text = table.text.encode("utf-8", "surrogatepass")
+    sentence_text = "".join(sentence_texts).encode("utf-8", "surrogatepass")
+    fonts = "\0".join(table.fonts.names).encode("utf-8", "surrogatepass")
+
+    header = _PACKED_HEADER.pack(
+        PACKED_MAGIC,
+        PACKED_VERSION,
+        len(page_nums),
+        len(table),
+        len(table.fonts),
+        len(block_boxes) // 4,
+        len(sentence_texts),
+        len(image_pages),
+        len(span_text),
+    )
+    return b"".join(
+        (
+            header,
+            struct.pack("<II", len(sentence_text), len(fonts)),
+            page_nums.tobytes(),
+            table.offsets.tobytes(),
+            table.coords.tobytes(),
+            table.sizes.tobytes(),
+            table.pages.tobytes(),
+            table.font_ids.tobytes(),
+            table.fonts.flags.tobytes(),
+            block_runs.tobytes(),
+            block_boxes.tobytes(),
+            sentence_runs.tobytes(),
+            sentence_offsets.tobytes(),
+            image_pages.tobytes(),
+            image_boxes.tobytes(),
+            span_text,
+            sentence_text,
+            fonts,
+        )
+    )
 
-def extract_sentences(pdf_path: str | Path) -> list[Sentence]:
+
+class _PackedReader:
+    __slots__ = ("_view", "_pos")
+
+    def __init__(self, payload: bytes, pos: int) -> None:
+        self._view = memoryview(payload)
+        self._pos = pos
+
+    def take(self, typecode: str, count: int) -> array:
+        values = array(typecode)
+        end = self._pos + values.itemsize * count
+        values.frombytes(self._view[self._pos : end])
+        self._pos = end
+        return values
+
+    def text(self, nbytes: int) -> str:
+        end = self._pos + nbytes
+        value = str(self._view[self._pos : end], "utf-8", "surrogatepass")
+        self._pos = end
+        return value
+
+
+def unpack_pages(payload: bytes | memoryview) -> list[PageContent]:
+    (
+        magic,
+        version,
+        n_pages,
+        n_spans,
+        n_fonts,
+        n_blocks,
+        n_sentences,
+        n_images,
+        span_text_bytes,
+    ) = _PACKED_HEADER.unpack_from(payload)
+    if magic != PACKED_MAGIC or version != PACKED_VERSION:
+        raise ValueError("Unsupported packed page format")
+    sentence_text_bytes, font_bytes = struct.unpack_from(
+        "<II", payload, _PACKED_HEADER.size
+    )
+
+    reader = _PackedReader(payload, _PACKED_HEADER.size + 8)
+    page_nums = reader.take("i", n_pages)
+    offsets = reader.take("I", n_spans + 1)
+    coords = reader.take("d", n_spans * 4)
+    sizes = reader.take("d", n_spans)
+    span_pages = reader.take("i", n_spans)
+    font_ids = reader.take("I", n_spans)
+    font_flags = reader.take("I", n_fonts)
+    block_runs = reader.take("i", n_blocks * 3)
+    block_boxes = reader.take("d", n_blocks * 4)
+    sentence_runs = reader.take("i", n_sentences * 3)
+    sentence_offsets = reader.take("I", n_sentences + 1)
+    image_pages = reader.take("i", n_images)
+    image_boxes = reader.take("d", n_images * 4)
+    span_text = reader.text(span_text_bytes)
+    sentence_text = reader.text(sentence_text_bytes)
+    font_names = reader.text(font_bytes).split("\0") if n_fonts else []
+
+    fonts = FontRegistry.__new__(FontRegistry)
+    fonts.__setstate__((font_names, font_flags))
+    table = SpanTable.__new__(SpanTable)
+    table.__setstate__(
+        (span_text, offsets, coords, sizes, span_pages, font_ids, fonts)
+    )
+
+    views = table.spans(0, n_spans)
+    contents = {page_num: PageContent(page_num=page_num) for page_num in page_nums}
+    for i in range(n_blocks):
+        start, end, page_num = block_runs[3 * i : 3 * i + 3]
+        contents[page_num].blocks.append(
+            TextBlock(
+                spans=views[start:end],
+                bbox=tuple(block_boxes[4 * i : 4 * i + 4]),
+                page_num=page_num,
+            )
+        )
+    for i in range(n_sentences):
+        start, end, page_num = sentence_runs[3 * i : 3 * i + 3]
+        contents[page_num].sentences.append(
+            Sentence(
+                text=sentence_text[sentence_offsets[i] : sentence_offsets[i + 1]],
+                spans=views[start:end],
+                page_num=page_num,
+            )
+        )
+    for i in range(n_images):
+        contents[image_pages[i]].images.append(
+            ImageRegion(
+                bbox=tuple(image_boxes[4 * i : 4 * i + 4]),
+                page_num=image_pages[i],
+            )
+        )
+
+    return list(contents.values())
+
+
+class PackedPages:
+    __slots__ = ("_pages", "_payload")
+
+    def __init__(self, pages: list[PageContent]) -> None:
+        self._pages: list[PageContent] | None = pages
+        self._payload: bytes | None = None
+
+    @classmethod
+    def _from_payload(cls, payload: bytes) -> "PackedPages":
+        packed = cls.__new__(cls)
+        packed._pages = None
+        packed._payload = payload
+        return packed
+
+    @property
+    def payload(self) -> bytes:
+        if self._payload is None:
+            return pack_pages(self._pages)
+        return self._payload
+
+    @property
+    def pages(self) -> list[PageContent]:
+        if self._pages is None:
+            with stage("decode"):
+                self._pages = unpack_pages(self._payload)
+        return self._pages
+
+    def release_payload(self) -> None:
+        if self._pages is not None:
+            self._payload = None
+
+    def __reduce__(self) -> tuple:
+        return (PackedPages._from_payload, (self.payload,))
+
+
+def _extract_packed_page_range(page_range: PageRange) -> list[PackedPages]:
+    return [PackedPages(_extract_content_from_page_range(page_range))]
+
+
+def unpack_chunks(chunks: list[PackedPages]) -> list[PageContent]:
+    return [page for chunk in chunks for page in chunk.pages]
+
+
+def assemble_document(
+    page_count: int,
+    pages: list[PageContent],
+    selected_pages: list[int] | None = None,
+) -> DocumentContent:
+    document = DocumentContent(page_count=page_count, selected_pages=selected_pages)
+    tables: set[int] = set()
+    for page in pages:
+        for block in page.blocks[:1]:
+            table = block.spans[0]._table
+            if id(table) not in tables:
+                tables.add(id(table))
+                document.fonts.merge(table.fonts)
+        document.blocks.extend(page.blocks)
+        document.sentences.extend(page.sentences)
+        document.images.extend(page.images)
+    return document
+
+
+def _get_page_count(pdf_path: str | Path) -> int:
     doc = pymupdf.open(str(pdf_path))
     total_pages = len(doc)
     doc.close()
+    return total_pages
+
+
+def document_cache_kind(pages: list[int] | None) -> str:
+    if pages is None:
+        return "document"
+    return f"document:{format_page_selection(pages)}"
+
+
+def _decode_stored(stored: StoredDocument) -> DocumentContent:
+    pages = [page for chunk in stored.chunks for page in unpack_pages(chunk)]
+    return assemble_document(stored.page_count, pages, stored.selected_pages)
+
+
+def load_stored_document(
+    pdf_path: str | Path,
+    pages: list[int] | None = None,
+) -> DocumentContent | None:
+    store = get_extraction_store(EXTRACTION_VERSION)
+    if store is None:
+        return None
+
+    with stage("store.load"):
+        document = store.load(pdf_path, document_cache_kind(pages), _decode_stored)
+        if document is None and pages is not None:
+            full = store.load(pdf_path, "document", _decode_stored)
+            document = full.subset(pages) if full is not None else None
+
+    count("store_hits" if document is not None else "store_misses")
+    return document
+
+
+def save_stored_document(
+    pdf_path: str | Path,
+    document: DocumentContent,
+    chunks: list[PackedPages],
+) -> None:
+    store = get_extraction_store(EXTRACTION_VERSION)
+    if store is not None:
+        with stage("store.save"):
+            try:
+                store.save(
+                    pdf_path,
+                    document_cache_kind(document.selected_pages),
+                    document.page_count,
+                    document.selected_pages,
+                    [chunk.payload for chunk in chunks],
+                )
+            except OSError:
+                count("store_errors")
 
-    return process_pages_parallel(
+    for chunk in chunks:
+        chunk.release_payload()
+
+
+def submit_document_extraction(
+    pdf_path: str | Path,
+    pages: list[int] | None = None,
+) -> tuple[int, list[tuple[PageRange, Future]]]:
+    total_pages = _get_page_count(pdf_path)
+    submissions = submit_pages_parallel(
         pdf_path,
         total_pages,
-        _extract_sentences_from_page_range,
+        _extract_packed_page_range,
+        pages,
     )
+    return total_pages, submissions
+
+
+def _extract_document_uncached(
+    pdf_path: str | Path,
+    pages: list[int] | None = None,
+) -> DocumentContent:
+    count("extract_cache_misses")
+    stored = load_stored_document(pdf_path, pages)
+    if stored is not None:
+        return stored
+
+    total_pages = _get_page_count(pdf_path)
+    chunks = process_pages_parallel(
+        pdf_path,
+        total_pages,
+        _extract_packed_page_range,
+        pages,
+    )
+    page_contents = unpack_chunks(chunks)
+    with stage("assemble"):
+        document = assemble_document(total_pages, page_contents, pages)
+    save_stored_document(pdf_path, document, chunks)
+    return document
+
+
+def extract_document(
+    pdf_path: str | Path,
+    pages: list[int] | None = None,
+) -> DocumentContent:
+    with stage("extract"):
+        cache = get_extraction_cache()
+        if pages is not None:
+            full = cache.get(cache.key_for(pdf_path), "document")
+            if full is not None:
+                return full.subset(pages)
+
+        return cache.get_or_compute(
+            pdf_path,
+            document_cache_kind(pages),
+            lambda: _extract_document_uncached(pdf_path, pages),
+        )
+
+
+def extract_text_blocks(
+    pdf_path: str | Path,
+    pages: list[int] | None = None,
+) -> list[TextBlock]:
+    return list(extract_document(pdf_path, pages).blocks)
+
+
+def extract_all_spans(
+    pdf_path: str | Path,
+    pages: list[int] | None = None,
+) -> list[TextSpan]:
+    return extract_document(pdf_path, pages).spans
+
+
+def extract_sentences(
+    pdf_path: str | Path,
+    pages: list[int] | None = None,
+) -> list[Sentence]:
+    return list(extract_document(pdf_path, pages).sentences)
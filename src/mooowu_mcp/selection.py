@@ -0,0 +1,94 @@
+from pathlib import Path
+from typing import Any
+import pymupdf
+
+
+def parse_page_spec(spec: str, total_pages: int) -> list[int]:
+    pages: set[int] = set()
+
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+
+        if "-" in part:
+            start_text, end_text = (p.strip() for p in part.split("-", 1))
+            start = int(start_text) if start_text else 1
+            end = int(end_text) if end_text else total_pages
+        else:
+            start = end = int(part)
+
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range: {part}")
+        if start > total_pages:
+            raise ValueError(
+                f"Page range {part} is outside the document ({total_pages} pages)"
+            )
+
+        pages.update(range(start - 1, min(end, total_pages)))
+
+    if not pages:
+        raise ValueError(f"No pages selected by: {spec}")
+    return sorted(pages)
+
+
+def _normalize_title(title: str) -> str:
+    return " ".join(title.split()).casefold()
+
+
+def resolve_section(toc: list[Any], section: str, total_pages: int) -> list[int]:
+    wanted = _normalize_title(section)
+    entries = [(level, _normalize_title(title), page) for level, title, page, *_ in toc]
+
+    match = next((i for i, e in enumerate(entries) if e[1] == wanted), None)
+    if match is None:
+        match = next((i for i, e in enumerate(entries) if wanted in e[1]), None)
+    if match is None:
+        raise ValueError(f"Section not found: {section}")
+
+    level, _, start_page = entries[match]
+    end_page = total_pages
+    for next_level, _, next_page in entries[match + 1 :]:
+        if next_level <= level:
+            end_page = max(start_page, next_page - 1)
+            break
+
+    start = max(start_page, 1) - 1
+    return list(range(start, min(end_page, total_pages)))
+
+
+def select_pages(
+    pdf_path: str | Path,
+    pages: str | None = None,
+    section: str | None = None,
+) -> list[int] | None:
+    if not pages and not section:
+        return None
+
+    doc = pymupdf.open(str(pdf_path))
+    total_pages = len(doc)
+    toc = doc.get_toc() if section else []
+    doc.close()
+
+    selected: set[int] | None = None
+    if pages:
+        selected = set(parse_page_spec(pages, total_pages))
+    if section:
+        section_pages = set(resolve_section(toc, section, total_pages))
+        selected = section_pages if selected is None else selected & section_pages
+
+    if not selected:
+        raise ValueError("Page and section selectors do not overlap")
+    return sorted(selected)
+
+
+def format_page_selection(pages: list[int]) -> str:
+    runs: list[str] = []
+    start = prev = pages[0]
+    for page in pages[1:] + [-1]:
+        if page == prev + 1:
+            prev = page
+            continue
+        runs.append(str(start) if start == prev else f"{start}-{prev}")
+        start = prev = page
+    return ",".join(runs)
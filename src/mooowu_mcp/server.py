@@ -1,32 +1,207 @@
 from pathlib import Path
-from typing import cast
-from mcp.server.fastmcp import FastMCP
+from typing import Any, Callable, TypeVar
+import asyncio
+import json
+import os
+import time
 
-from .pdf_reader import extract_sentences
-from .content_filter import filter_sentences, get_image_regions
-from .highlighter import highlight_sentences
+import anyio
+from mcp.server.fastmcp import Context, FastMCP
+
+from .admission import BULK, INTERACTIVE, AdmissionController
+from .pdf_reader import extract_document
+from .content_filter import (
+    count_highlightable,
+    filter_sentences,
+    filtered_cache_kind,
+    get_filtered_sentences,
+    get_image_regions,
+)
+from .highlighter import SaveMode, highlight_sentences
+from .matching import SentenceIndex, DEFAULT_MIN_SCORE
+from .pagination import document_fingerprint, paginate_sentences
+from .parallel import MAX_WORKERS, open_document, warm_pool, shutdown_pool
+from .selection import select_pages
+from .streaming import stream_filtered_text
+from .timing import collect_timings, stage
+
+T = TypeVar("T")
 
 mcp = FastMCP("mooowu-mcp")
 
+MAX_CONCURRENT_REQUESTS = int(
+    os.environ.get("MOOOWU_MCP_MAX_CONCURRENT_REQUESTS", MAX_WORKERS)
+)
+
+MAX_QUEUED_REQUESTS = int(os.environ.get("MOOOWU_MCP_MAX_QUEUED_REQUESTS", 32))
+INTERACTIVE_MAX_PAGES = 50
+CLASSIFY_CONCURRENCY = 2
+
+_admission: AdmissionController | None = None
+_admission_loop: asyncio.AbstractEventLoop | None = None
+_classify_limiter: anyio.CapacityLimiter | None = None
+
+
+def set_max_concurrent_requests(limit: int) -> None:
+    global MAX_CONCURRENT_REQUESTS
+    if limit < 1:
+        raise ValueError("Concurrency limit must be at least 1")
+    MAX_CONCURRENT_REQUESTS = limit
+    if _admission is not None:
+        _admission.set_limits(max_running=limit)
+
+
+def set_max_queued_requests(limit: int) -> None:
+    global MAX_QUEUED_REQUESTS
+    if limit < 0:
+        raise ValueError("Queue limit must not be negative")
+    MAX_QUEUED_REQUESTS = limit
+    if _admission is not None:
+        _admission.set_limits(max_queued=limit)
+
+
+def _request_admission() -> AdmissionController:
+    global _admission, _admission_loop, _classify_limiter
+    loop = asyncio.get_running_loop()
+    if _admission is None or _admission_loop is not loop:
+        _admission = AdmissionController(MAX_CONCURRENT_REQUESTS, MAX_QUEUED_REQUESTS)
+        _classify_limiter = anyio.CapacityLimiter(CLASSIFY_CONCURRENCY)
+        _admission_loop = loop
+    return _admission
+
+
+def _request_pages(
+    pdf_path: str,
+    pages: str | None,
+    section: str | None,
+) -> tuple[list[int] | None, int]:
+    selected = select_pages(pdf_path, pages, section)
+    if selected is not None:
+        return selected, len(selected)
+    with open_document(pdf_path) as doc:
+        return None, len(doc)
+
+
+async def _classify_request(
+    pdf_path: str,
+    pages: str | None,
+    section: str | None,
+) -> tuple[int, list[int] | None]:
+    _request_admission().check_capacity()
+    selected, page_count = await anyio.to_thread.run_sync(
+        _request_pages, pdf_path, pages, section, limiter=_classify_limiter
+    )
+    priority = INTERACTIVE if page_count <= INTERACTIVE_MAX_PAGES else BULK
+    return priority, selected
+
+
+async def _offload(
+    func: Callable[..., T],
+    *args: Any,
+    priority: int = INTERACTIVE,
+) -> T:
+    async with _request_admission().admit(priority):
+        return await anyio.to_thread.run_sync(func, *args)
+
+
+def _with_timings(
+    include_timings: bool,
+    queued_at: float,
+    func: Callable[..., dict],
+    *args: Any,
+) -> dict:
+    if not include_timings:
+        return func(*args)
+
+    with collect_timings() as timings:
+        timings.add("request_queue", time.perf_counter() - queued_at)
+        with stage("total"):
+            response = func(*args)
+        with stage("serialize"):
+            timings.count("response_bytes", len(json.dumps(response)))
+
+    response["timings"] = timings.as_dict()
+    return response
+
 
 @mcp.tool()
-def read_pdf(pdf_path: str) -> str:
+async def read_pdf(
+    pdf_path: str,
+    pages: str | None = None,
+    section: str | None = None,
+    stream: bool = False,
+    limit: int | None = None,
+    cursor: str | None = None,
+    ctx: Context | None = None,
+) -> str | dict:
     path = Path(pdf_path)
     if not path.exists():
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
-    sentences = extract_sentences(pdf_path)
-    filtered = filter_sentences(sentences, pdf_path)
+    if stream and (limit is not None or cursor is not None):
+        raise ValueError("stream cannot be combined with limit or cursor")
+
+    priority, selected = await _classify_request(pdf_path, pages, section)
+    if not stream:
+        return await _offload(
+            _read_text, pdf_path, selected, limit, cursor, priority=priority
+        )
 
-    return "\n".join(s.text for s in filtered)
+    async with _request_admission().admit(priority):
+        parts: list[str] = []
+        async for chunk in stream_filtered_text(pdf_path, selected):
+            if chunk.text:
+                parts.append(chunk.text)
+            if ctx is None:
+                continue
+
+            await ctx.report_progress(
+                chunk.pages_done,
+                chunk.pages_total,
+                message=f"Read pages {chunk.page_start + 1}-{chunk.page_end}",
+            )
+            if chunk.text:
+                await ctx.log("info", chunk.text, logger_name="read_pdf")
+
+    return "\n".join(parts)
+
+
+def _read_text(
+    pdf_path: str,
+    selected: list[int] | None,
+    limit: int | None,
+    cursor: str | None,
+) -> str | dict:
+    filtered = get_filtered_sentences(pdf_path, selected)
+    if limit is None and cursor is None:
+        return "\n".join(s.text for s in filtered)
+
+    page = paginate_sentences(
+        filtered,
+        limit,
+        cursor,
+        document_fingerprint(pdf_path),
+        filtered_cache_kind(selected, False),
+    )
+    return {
+        "text": "\n".join(s.text for s in page.sentences),
+        "sentence_count": len(page.sentences),
+        "total_sentence_count": len(filtered),
+        "next_cursor": page.next_cursor,
+    }
 
 
 @mcp.tool()
-def highlight_pdf(
+async def highlight_pdf(
     pdf_path: str,
     sentences: list[str],
     output_path: str | None = None,
     color: list[float] | None = None,
+    min_match_score: float = DEFAULT_MIN_SCORE,
+    pages: str | None = None,
+    section: str | None = None,
+    save_mode: SaveMode = "rewrite",
+    include_timings: bool = False,
 ) -> dict:
     path = Path(pdf_path)
     if not path.exists():
@@ -36,25 +211,63 @@ def highlight_pdf(
     if color and len(color) >= 3:
         highlight_color = (float(color[0]), float(color[1]), float(color[2]))
 
-    all_sentences = extract_sentences(pdf_path)
-    filtered = filter_sentences(all_sentences, pdf_path)
+    queued_at = time.perf_counter()
+    priority, selected = await _classify_request(pdf_path, pages, section)
+    return await _offload(
+        _with_timings,
+        include_timings,
+        queued_at,
+        _highlight,
+        pdf_path,
+        sentences,
+        output_path,
+        highlight_color,
+        min_match_score,
+        selected,
+        save_mode,
+        priority=priority,
+    )
+
+
+def _highlight(
+    pdf_path: str,
+    sentences: list[str],
+    output_path: str | None,
+    highlight_color: tuple[float, float, float],
+    min_match_score: float,
+    selected: list[int] | None,
+    save_mode: SaveMode,
+) -> dict:
+    document = extract_document(pdf_path, selected)
+    filtered = filter_sentences(document.sentences, pdf_path, document.images)
 
     matched: list = []
+    fuzzy_matches: list[dict] = []
     not_found: list[str] = []
 
-    for search_text in sentences:
-        found = False
-        for sent in filtered:
-            if sent.text == search_text:
-                matched.append(sent)
-                found = True
-                break
-        if not found:
-            not_found.append(search_text)
+    with stage("match"):
+        index = SentenceIndex(filtered, min_score=min_match_score)
+        for search_text in sentences:
+            match = index.lookup(search_text)
+            if match is None:
+                not_found.append(search_text)
+                continue
+
+            matched.append(match.sentence)
+            if not match.exact:
+                fuzzy_matches.append(
+                    {
+                        "requested": search_text,
+                        "matched": match.sentence.text,
+                        "score": round(match.score, 3),
+                    }
+                )
 
     if matched:
         out_path = Path(output_path) if output_path else None
-        result_path = highlight_sentences(pdf_path, matched, out_path, highlight_color)
+        result_path = highlight_sentences(
+            pdf_path, matched, out_path, highlight_color, save_mode
+        )
     else:
         result_path = Path(pdf_path)
 
@@ -64,6 +277,9 @@ def highlight_pdf(
         "total_requested": len(sentences),
     }
 
+    if fuzzy_matches:
+        response["fuzzy_matches"] = fuzzy_matches
+
     if not_found:
         response["warnings"] = [f"Sentence not found: {s}" for s in not_found]
 
@@ -71,35 +287,93 @@ def highlight_pdf(
 
 
 @mcp.tool()
-def analyze_pdf(pdf_path: str) -> dict:
+async def analyze_pdf(
+    pdf_path: str,
+    pages: str | None = None,
+    section: str | None = None,
+    include_drawings: bool = False,
+    counts_only: bool = False,
+    limit: int | None = None,
+    cursor: str | None = None,
+    include_timings: bool = False,
+) -> dict:
     path = Path(pdf_path)
     if not path.exists():
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
-    import pymupdf
+    queued_at = time.perf_counter()
+    priority, selected = await _classify_request(pdf_path, pages, section)
+    return await _offload(
+        _with_timings,
+        include_timings,
+        queued_at,
+        _analyze,
+        pdf_path,
+        selected,
+        include_drawings,
+        counts_only,
+        limit,
+        cursor,
+        priority=priority,
+    )
 
-    doc = pymupdf.open(str(path))
-    page_count = len(doc)
-    doc.close()
 
-    sentences = extract_sentences(pdf_path)
-    images = get_image_regions(pdf_path)
-    filtered = filter_sentences(sentences, pdf_path, images)
+def _analyze(
+    pdf_path: str,
+    selected: list[int] | None,
+    include_drawings: bool,
+    counts_only: bool,
+    limit: int | None,
+    cursor: str | None,
+) -> dict:
+    document = extract_document(pdf_path, selected)
+    sentences = document.sentences
+    images = document.images
+    if include_drawings:
+        images = get_image_regions(pdf_path, selected, include_drawings=True)
 
-    code_sentence_count = len(sentences) - len(filtered)
+    filtered = None
+    if counts_only:
+        highlightable_count = count_highlightable(sentences, pdf_path, images)
+    else:
+        filtered = get_filtered_sentences(pdf_path, selected, include_drawings)
+        highlightable_count = len(filtered)
 
-    return {
-        "page_count": page_count,
+    response = {
+        "page_count": document.page_count,
         "sentence_count": len(sentences),
-        "highlightable_sentence_count": len(filtered),
-        "code_block_sentence_count": code_sentence_count,
+        "highlightable_sentence_count": highlightable_count,
+        "code_block_sentence_count": len(sentences) - highlightable_count,
         "image_count": len(images),
-        "highlightable_sentences": [s.text for s in filtered],
+        "code_fonts": document.fonts.code_fonts(),
+        "fonts": [info.as_dict() for info in document.fonts],
     }
 
+    if filtered is not None and limit is None and cursor is None:
+        response["highlightable_sentences"] = [s.text for s in filtered]
+    elif filtered is not None:
+        page = paginate_sentences(
+            filtered,
+            limit,
+            cursor,
+            document_fingerprint(pdf_path),
+            filtered_cache_kind(selected, include_drawings),
+        )
+        response["highlightable_sentences"] = [s.text for s in page.sentences]
+        response["next_cursor"] = page.next_cursor
+
+    if selected is not None:
+        response["selected_page_count"] = len(selected)
+
+    return response
+
 
 def main():
-    mcp.run(transport="streamable-http")
+    warm_pool()
+    try:
+        mcp.run(transport="streamable-http")
+    finally:
+        shutdown_pool()
 
 
 if __name__ == "__main__":
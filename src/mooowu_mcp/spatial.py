@@ -0,0 +1,164 @@
+from collections import defaultdict
+from math import floor, hypot, inf
+
+from .pdf_reader import ImageRegion
+
+DEFAULT_CELL_SIZE = 64.0
+
+BBox = tuple[float, float, float, float]
+
+
+def _overlaps(a: BBox, b: BBox) -> bool:
+    return a[0] < b[2] and a[2] > b[0] and a[1] < b[3] and a[3] > b[1]
+
+
+def _contains(outer: BBox, inner: BBox) -> bool:
+    return (
+        outer[0] <= inner[0]
+        and outer[1] <= inner[1]
+        and outer[2] >= inner[2]
+        and outer[3] >= inner[3]
+    )
+
+
+def _distance(a: BBox, b: BBox) -> float:
+    dx = max(b[0] - a[2], a[0] - b[2], 0.0)
+    dy = max(b[1] - a[3], a[1] - b[3], 0.0)
+    return hypot(dx, dy)
+
+
+class _PageGrid:
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.regions: list[ImageRegion] = []
+        self.cells: dict[tuple[int, int], list[int]] = defaultdict(list)
+        self.min_cell = (0, 0)
+        self.max_cell = (0, 0)
+
+    def cell_range(self, bbox: BBox) -> tuple[int, int, int, int]:
+        size = self.cell_size
+        return (
+            floor(bbox[0] / size),
+            floor(bbox[1] / size),
+            floor(bbox[2] / size),
+            floor(bbox[3] / size),
+        )
+
+    def add(self, region: ImageRegion) -> None:
+        index = len(self.regions)
+        self.regions.append(region)
+
+        cx0, cy0, cx1, cy1 = self.cell_range(region.bbox)
+        if index == 0:
+            self.min_cell = (cx0, cy0)
+            self.max_cell = (cx1, cy1)
+        else:
+            self.min_cell = (min(self.min_cell[0], cx0), min(self.min_cell[1], cy0))
+            self.max_cell = (max(self.max_cell[0], cx1), max(self.max_cell[1], cy1))
+
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.cells[(cx, cy)].append(index)
+
+    def candidates(self, bbox: BBox):
+        cx0, cy0, cx1, cy1 = self.cell_range(bbox)
+        cx0 = max(cx0, self.min_cell[0])
+        cy0 = max(cy0, self.min_cell[1])
+        cx1 = min(cx1, self.max_cell[0])
+        cy1 = min(cy1, self.max_cell[1])
+
+        seen: set[int] = set()
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for index in self.cells.get((cx, cy), ()):
+                    if index not in seen:
+                        seen.add(index)
+                        yield self.regions[index]
+
+
+class SpatialIndex:
+    def __init__(
+        self,
+        regions: list[ImageRegion],
+        cell_size: float = DEFAULT_CELL_SIZE,
+    ):
+        self.cell_size = cell_size
+        self._pages: dict[int, _PageGrid] = {}
+        for region in regions:
+            grid = self._pages.get(region.page_num)
+            if grid is None:
+                grid = self._pages[region.page_num] = _PageGrid(cell_size)
+            grid.add(region)
+
+    def __len__(self) -> int:
+        return sum(len(grid.regions) for grid in self._pages.values())
+
+    def page_regions(self, page_num: int) -> list[ImageRegion]:
+        grid = self._pages.get(page_num)
+        return list(grid.regions) if grid else []
+
+    def any_overlap(self, bbox: BBox, page_num: int) -> bool:
+        grid = self._pages.get(page_num)
+        if grid is None:
+            return False
+        return any(_overlaps(bbox, r.bbox) for r in grid.candidates(bbox))
+
+    def overlapping(self, bbox: BBox, page_num: int) -> list[ImageRegion]:
+        grid = self._pages.get(page_num)
+        if grid is None:
+            return []
+        return [r for r in grid.candidates(bbox) if _overlaps(bbox, r.bbox)]
+
+    def containing(self, bbox: BBox, page_num: int) -> list[ImageRegion]:
+        grid = self._pages.get(page_num)
+        if grid is None:
+            return []
+        return [r for r in grid.candidates(bbox) if _contains(r.bbox, bbox)]
+
+    def contained_in(self, bbox: BBox, page_num: int) -> list[ImageRegion]:
+        grid = self._pages.get(page_num)
+        if grid is None:
+            return []
+        return [r for r in grid.candidates(bbox) if _contains(bbox, r.bbox)]
+
+    def nearest(self, bbox: BBox, page_num: int) -> ImageRegion | None:
+        grid = self._pages.get(page_num)
+        if grid is None:
+            return None
+
+        cx0, cy0, cx1, cy1 = grid.cell_range(bbox)
+        max_ring = max(
+            cx0 - grid.min_cell[0],
+            cy0 - grid.min_cell[1],
+            grid.max_cell[0] - cx1,
+            grid.max_cell[1] - cy1,
+            0,
+        )
+
+        best: ImageRegion | None = None
+        best_distance = inf
+        seen: set[int] = set()
+
+        for ring in range(max_ring + 1):
+            if (ring - 1) * grid.cell_size >= best_distance:
+                break
+
+            for cx in range(cx0 - ring, cx1 + ring + 1):
+                for cy in range(cy0 - ring, cy1 + ring + 1):
+                    on_ring = (
+                        ring == 0
+                        or cx in (cx0 - ring, cx1 + ring)
+                        or cy in (cy0 - ring, cy1 + ring)
+                    )
+                    if not on_ring:
+                        continue
+                    for index in grid.cells.get((cx, cy), ()):
+                        if index in seen:
+                            continue
+                        seen.add(index)
+                        region = grid.regions[index]
+                        distance = _distance(bbox, region.bbox)
+                        if distance < best_distance:
+                            best, best_distance = region, distance
+
+        return best
@@ -0,0 +1,253 @@
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, TypeVar
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+from .cache import FileKey, file_key, hash_file
+
+T = TypeVar("T")
+
+STORE_VERSION = 1
+STORE_MAGIC = b"MWST"
+STORE_SUFFIX = ".mwst"
+DEFAULT_STORE_BYTES = 2 * 1024 * 1024 * 1024
+EVICT_TO_RATIO = 0.9
+
+_HEADER = struct.Struct("<4sHHIiI")
+
+
+@dataclass
+class StoredDocument:
+    page_count: int
+    selected_pages: list[int] | None
+    chunks: list[memoryview]
+
+
+class ExtractionStore:
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int = DEFAULT_STORE_BYTES,
+        extraction_version: int = 1,
+    ):
+        self.root = Path(directory)
+        self.max_bytes = max_bytes
+        self.extraction_version = extraction_version
+        self.directory = self.root / f"v{STORE_VERSION}.{extraction_version}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._hashes: dict[FileKey, str] = {}
+        self._lock = threading.Lock()
+        self._bytes = self._scan_bytes()
+
+    def content_hash(self, pdf_path: str | Path) -> str:
+        key = file_key(pdf_path)
+        with self._lock:
+            digest = self._hashes.get(key)
+        if digest is None:
+            digest = hash_file(key.path)
+            with self._lock:
+                self._hashes[key] = digest
+        return digest
+
+    def _entry_path(self, content_hash: str, kind: str) -> Path:
+        if kind == "document":
+            return self.directory / f"{content_hash}{STORE_SUFFIX}"
+        kind_hash = hashlib.blake2b(kind.encode(), digest_size=8).hexdigest()
+        return self.directory / f"{content_hash}-{kind_hash}{STORE_SUFFIX}"
+
+    def load(
+        self,
+        pdf_path: str | Path,
+        kind: str,
+        decode: Callable[[StoredDocument], T],
+    ) -> T | None:
+        path = self._entry_path(self.content_hash(pdf_path), kind)
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        view = memoryview(mapped)
+        stored: StoredDocument | None = None
+        result: T | None = None
+        try:
+            stored = self._parse(view)
+            if stored is not None:
+                result = decode(stored)
+        except (ValueError, IndexError, KeyError, struct.error):
+            result = None
+        finally:
+            if stored is not None:
+                for chunk in stored.chunks:
+                    chunk.release()
+            view.release()
+            mapped.close()
+
+        if result is None:
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return result
+
+    def _parse(self, view: memoryview) -> StoredDocument | None:
+        if len(view) < _HEADER.size:
+            return None
+        magic, store_version, extraction_version, page_count, n_selected, n_chunks = (
+            _HEADER.unpack_from(view)
+        )
+        if (
+            magic != STORE_MAGIC
+            or store_version != STORE_VERSION
+            or extraction_version != self.extraction_version
+        ):
+            return None
+
+        pos = _HEADER.size
+        selected: list[int] | None = None
+        if n_selected >= 0:
+            values = array("i")
+            values.frombytes(view[pos : pos + 4 * n_selected])
+            selected = values.tolist()
+            pos += 4 * n_selected
+
+        lengths = array("Q")
+        lengths.frombytes(view[pos : pos + 8 * n_chunks])
+        pos += 8 * n_chunks
+
+        chunks: list[memoryview] = []
+        for length in lengths:
+            chunks.append(view[pos : pos + length])
+            pos += length
+        if pos != len(view):
+            for chunk in chunks:
+                chunk.release()
+            return None
+
+        return StoredDocument(page_count, selected, chunks)
+
+    def save(
+        self,
+        pdf_path: str | Path,
+        kind: str,
+        page_count: int,
+        selected_pages: list[int] | None,
+        chunks: list[bytes],
+    ) -> None:
+        path = self._entry_path(self.content_hash(pdf_path), kind)
+        header = _HEADER.pack(
+            STORE_MAGIC,
+            STORE_VERSION,
+            self.extraction_version,
+            page_count,
+            -1 if selected_pages is None else len(selected_pages),
+            len(chunks),
+        )
+        parts = [header]
+        if selected_pages is not None:
+            parts.append(array("i", selected_pages).tobytes())
+        parts.append(array("Q", [len(chunk) for chunk in chunks]).tobytes())
+        parts.extend(chunks)
+
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for part in parts:
+                    f.write(part)
+            os.replace(temp_path, path)
+        except BaseException:
+            self._remove(Path(temp_path))
+            raise
+
+        with self._lock:
+            self._bytes += sum(len(part) for part in parts)
+            over = self._bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def _scan_bytes(self) -> int:
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self) -> list[tuple[float, Path, int]]:
+        entries: list[tuple[float, Path, int]] = []
+        for path in self.root.glob(f"*/*{STORE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _remove(self, path: Path) -> bool:
+        try:
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def evict(self) -> int:
+        entries = sorted(self._entries(), key=lambda entry: entry[0])
+        total = sum(size for _, _, size in entries)
+        target = int(self.max_bytes * EVICT_TO_RATIO)
+
+        removed = 0
+        for _, path, size in entries:
+            if total <= target:
+                break
+            if self._remove(path):
+                removed += 1
+            total -= size
+
+        with self._lock:
+            self._bytes = total
+        return removed
+
+    def clear(self) -> int:
+        removed = 0
+        for _, path, _ in self._entries():
+            if self._remove(path):
+                removed += 1
+        with self._lock:
+            self._bytes = 0
+        return removed
+
+
+_store: ExtractionStore | None = None
+_store_configured = False
+_store_lock = threading.Lock()
+
+
+def set_extraction_store(store: ExtractionStore | None) -> None:
+    global _store, _store_configured
+    with _store_lock:
+        _store = store
+        _store_configured = True
+
+
+def get_extraction_store(extraction_version: int = 1) -> ExtractionStore | None:
+    global _store, _store_configured
+    with _store_lock:
+        if not _store_configured:
+            directory = os.environ.get("MOOOWU_MCP_CACHE_DIR")
+            if directory:
+                _store = ExtractionStore(
+                    directory,
+                    int(
+                        os.environ.get(
+                            "MOOOWU_MCP_CACHE_MAX_BYTES", DEFAULT_STORE_BYTES
+                        )
+                    ),
+                    extraction_version,
+                )
+            _store_configured = True
+        return _store
@@ -0,0 +1,133 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator
+import asyncio
+
+import anyio
+
+from .cache import get_extraction_cache
+from .content_filter import filter_sentences
+from .pdf_reader import (
+    DocumentContent,
+    PageContent,
+    assemble_document,
+    PackedPages,
+    document_cache_kind,
+    load_stored_document,
+    save_stored_document,
+    submit_document_extraction,
+    unpack_chunks,
+)
+
+
+@dataclass
+class TextChunk:
+    page_start: int
+    page_end: int
+    pages_done: int
+    pages_total: int
+    text: str
+
+
+def _filtered_text(pages: list[PageContent], pdf_path: str | Path) -> str:
+    sentences = [sentence for page in pages for sentence in page.sentences]
+    images = [image for page in pages for image in page.images]
+    filtered = filter_sentences(sentences, pdf_path, images)
+    return "\n".join(s.text for s in filtered)
+
+
+def _load_document(
+    pdf_path: str | Path,
+    pages: list[int] | None,
+) -> DocumentContent | None:
+    cache = get_extraction_cache()
+    key = cache.key_for(pdf_path)
+    kind = document_cache_kind(pages)
+
+    document = cache.get(key, kind)
+    if document is None and pages is not None:
+        full = cache.get(key, "document")
+        document = full.subset(pages) if full is not None else None
+    if document is None:
+        document = load_stored_document(pdf_path, pages)
+        if document is not None:
+            cache.put(key, kind, document)
+    return document
+
+
+def _document_text(document: DocumentContent, pdf_path: str | Path) -> str:
+    filtered = filter_sentences(document.sentences, pdf_path, document.images)
+    return "\n".join(s.text for s in filtered)
+
+
+def _decode_chunks(
+    chunks: list[PackedPages],
+    pdf_path: str | Path,
+) -> tuple[list[PageContent], str]:
+    chunk_pages = unpack_chunks(chunks)
+    return chunk_pages, _filtered_text(chunk_pages, pdf_path)
+
+
+def _store_document(
+    pdf_path: str | Path,
+    page_count: int,
+    pages: list[PageContent],
+    selected_pages: list[int] | None,
+    chunks: list[PackedPages],
+) -> None:
+    cache = get_extraction_cache()
+    document = assemble_document(page_count, pages, selected_pages)
+    cache.put(cache.key_for(pdf_path), document_cache_kind(selected_pages), document)
+    save_stored_document(pdf_path, document, chunks)
+
+
+async def stream_filtered_text(
+    pdf_path: str | Path,
+    pages: list[int] | None = None,
+) -> AsyncIterator[TextChunk]:
+    document = await anyio.to_thread.run_sync(_load_document, pdf_path, pages)
+    if document is not None:
+        pages_total = document.page_count if pages is None else len(pages)
+        yield TextChunk(
+            page_start=0 if pages is None else pages[0],
+            page_end=document.page_count if pages is None else pages[-1] + 1,
+            pages_done=pages_total,
+            pages_total=pages_total,
+            text=await anyio.to_thread.run_sync(_document_text, document, pdf_path),
+        )
+        return
+
+    page_count, submissions = await anyio.to_thread.run_sync(
+        submit_document_extraction, pdf_path, pages
+    )
+    pages_total = page_count if pages is None else len(pages)
+    pages_done = 0
+    all_pages: list[PageContent] = []
+    all_chunks: list[PackedPages] = []
+
+    for page_range, future in submissions:
+        chunks = await asyncio.wrap_future(future)
+        chunk_pages, text = await anyio.to_thread.run_sync(
+            _decode_chunks, chunks, pdf_path
+        )
+        all_chunks.extend(chunks)
+        all_pages.extend(chunk_pages)
+        page_end = min(page_range.end, page_count)
+        if pages is None:
+            pages_done = page_end
+        else:
+            pages_done += bisect_left(pages, page_end) - bisect_left(
+                pages, page_range.start
+            )
+        yield TextChunk(
+            page_start=page_range.start,
+            page_end=page_end,
+            pages_done=pages_done,
+            pages_total=pages_total,
+            text=text,
+        )
+
+    await anyio.to_thread.run_sync(
+        _store_document, pdf_path, page_count, all_pages, pages, all_chunks
+    )
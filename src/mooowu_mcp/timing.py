@@ -0,0 +1,96 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+import time
+
+
+@dataclass(slots=True)
+class ChunkTiming:
+    index: int
+    page_start: int | None
+    page_end: int | None
+    queue_wait: float
+    run: float
+    decode: float
+    result_bytes: int
+
+
+@dataclass
+class Timings:
+    stages: dict[str, float] = field(default_factory=dict)
+    counters: dict[str, int] = field(default_factory=dict)
+    chunks: list[ChunkTiming] = field(default_factory=list)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, other: "Timings") -> None:
+        for name, seconds in other.stages.items():
+            self.add(name, seconds)
+        for name, amount in other.counters.items():
+            self.count(name, amount)
+        self.chunks.extend(other.chunks)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "stages_ms": {
+                name: round(seconds * 1000, 3) for name, seconds in self.stages.items()
+            },
+            "counters": dict(self.counters),
+            "chunks": [
+                {
+                    "index": chunk.index,
+                    "pages": (
+                        None
+                        if chunk.page_start is None
+                        else [chunk.page_start + 1, chunk.page_end]
+                    ),
+                    "queue_wait_ms": round(chunk.queue_wait * 1000, 3),
+                    "run_ms": round(chunk.run * 1000, 3),
+                    "decode_ms": round(chunk.decode * 1000, 3),
+                    "result_bytes": chunk.result_bytes,
+                }
+                for chunk in self.chunks
+            ],
+        }
+
+
+_active: ContextVar[Timings | None] = ContextVar("mooowu_timings", default=None)
+
+
+def active_timings() -> Timings | None:
+    return _active.get()
+
+
+@contextmanager
+def collect_timings() -> Iterator[Timings]:
+    timings = Timings()
+    token = _active.set(timings)
+    try:
+        yield timings
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    timings = _active.get()
+    if timings is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def count(name: str, amount: int = 1) -> None:
+    timings = _active.get()
+    if timings is not None:
+        timings.count(name, amount)
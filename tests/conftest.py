@@ -191,3 +191,32 @@ def sample_pdf_large(temp_dir: Path) -> Path:
     doc.save(pdf_path)
     doc.close()
     return pdf_path
+
+
+@pytest.fixture
+def sample_pdf_with_toc(temp_dir: Path) -> Path:
+    pdf_path = temp_dir / "sample_toc.pdf"
+    doc = pymupdf.open()
+
+    chapters = ["Introduction", "Methods", "Results"]
+    for chapter_num, chapter in enumerate(chapters):
+        for i in range(4):
+            page = doc.new_page()
+            page.insert_text(
+                (72, 72),
+                f"{chapter} page {i + 1}. Chapter {chapter_num + 1} text.",
+                fontsize=12,
+                fontname="helv",
+            )
+
+    doc.set_toc(
+        [
+            [1, "Introduction", 1],
+            [1, "Methods", 5],
+            [2, "Setup", 6],
+            [1, "Results", 9],
+        ]
+    )
+    doc.save(pdf_path)
+    doc.close()
+    return pdf_path
@@ -0,0 +1,120 @@
+async def test_rejects_when_queue_is_full():
+    import anyio
+    import pytest
+
+    from mooowu_mcp.admission import AdmissionController, ServerBusyError
+
+    controller = AdmissionController(max_running=1, max_queued=1)
+    release = anyio.Event()
+
+    async def hold():
+        async with controller.admit():
+            await release.wait()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(hold)
+        tg.start_soon(hold)
+        await anyio.wait_all_tasks_blocked()
+        assert (controller.running, controller.queued) == (1, 1)
+
+        with pytest.raises(ServerBusyError, match="Server busy"):
+            async with controller.admit():
+                pass
+        release.set()
+
+    assert (controller.running, controller.queued) == (0, 0)
+
+
+async def test_interactive_requests_jump_queued_bulk():
+    import anyio
+
+    from mooowu_mcp.admission import BULK, INTERACTIVE, AdmissionController
+
+    controller = AdmissionController(max_running=1, max_queued=8)
+    release = anyio.Event()
+    order: list[str] = []
+
+    async def run(name: str, priority: int):
+        async with controller.admit(priority):
+            order.append(name)
+            if name == "first":
+                await release.wait()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(run, "first", BULK)
+        await anyio.wait_all_tasks_blocked()
+        tg.start_soon(run, "bulk", BULK)
+        await anyio.wait_all_tasks_blocked()
+        tg.start_soon(run, "interactive", INTERACTIVE)
+        await anyio.wait_all_tasks_blocked()
+        release.set()
+
+    assert order == ["first", "interactive", "bulk"]
+
+
+async def test_bulk_requests_leave_a_slot_for_interactive():
+    import anyio
+
+    from mooowu_mcp.admission import BULK, INTERACTIVE, AdmissionController
+
+    controller = AdmissionController(max_running=3, max_queued=8)
+    release = anyio.Event()
+    started: list[str] = []
+
+    async def run(name: str, priority: int):
+        async with controller.admit(priority):
+            started.append(name)
+            await release.wait()
+
+    async with anyio.create_task_group() as tg:
+        for i in range(3):
+            tg.start_soon(run, f"bulk{i}", BULK)
+        await anyio.wait_all_tasks_blocked()
+        assert started == ["bulk0", "bulk1"]
+
+        tg.start_soon(run, "interactive", INTERACTIVE)
+        await anyio.wait_all_tasks_blocked()
+        assert started[-1] == "interactive"
+        release.set()
+
+    assert sorted(started) == ["bulk0", "bulk1", "bulk2", "interactive"]
+
+
+async def test_cancelled_waiter_leaves_queue():
+    import anyio
+
+    from mooowu_mcp.admission import AdmissionController
+
+    controller = AdmissionController(max_running=1, max_queued=4)
+    release = anyio.Event()
+
+    async def hold():
+        async with controller.admit():
+            await release.wait()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(hold)
+        await anyio.wait_all_tasks_blocked()
+
+        with anyio.move_on_after(0.01):
+            async with controller.admit():
+                pass
+        assert controller.queued == 0
+        release.set()
+
+    assert controller.running == 0
+
+
+async def test_check_capacity_only_rejects_when_queue_is_full():
+    import pytest
+
+    from mooowu_mcp.admission import AdmissionController, ServerBusyError
+
+    controller = AdmissionController(max_running=1, max_queued=0)
+    controller.check_capacity()
+
+    async with controller.admit():
+        with pytest.raises(ServerBusyError, match="Server busy"):
+            controller.check_capacity()
+
+    controller.check_capacity()
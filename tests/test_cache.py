@@ -0,0 +1,79 @@
+from pathlib import Path
+import os
+
+
+def test_repeat_extraction_hits_cache(sample_pdf_with_text: Path):
+    from mooowu_mcp.cache import get_extraction_cache
+    from mooowu_mcp.pdf_reader import extract_sentences
+
+    cache = get_extraction_cache()
+    first = extract_sentences(sample_pdf_with_text)
+    hits_before = cache.stats().hits
+    second = extract_sentences(sample_pdf_with_text)
+
+    assert cache.stats().hits == hits_before + 1
+    assert [s.text for s in first] == [s.text for s in second]
+
+
+def test_modified_file_misses_cache(sample_pdf_with_text: Path):
+    from mooowu_mcp.cache import file_key
+
+    key = file_key(sample_pdf_with_text)
+    stat = os.stat(sample_pdf_with_text)
+    os.utime(sample_pdf_with_text, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert file_key(sample_pdf_with_text) != key
+
+
+def test_content_hash_in_key(sample_pdf_with_text: Path):
+    from mooowu_mcp.cache import file_key
+
+    key = file_key(sample_pdf_with_text, hash_content=True)
+
+    assert key.content_hash is not None
+    assert key == file_key(sample_pdf_with_text, hash_content=True)
+
+
+def test_eviction_respects_byte_budget():
+    from mooowu_mcp.cache import ExtractionCache, FileKey
+
+    cache = ExtractionCache(max_bytes=4096)
+    for i in range(10):
+        cache.put(FileKey(f"/doc{i}.pdf", 0, 0), "sentences", ["x" * 1000])
+
+    stats = cache.stats()
+    assert stats.bytes <= 4096
+    assert stats.evictions > 0
+    assert cache.get(FileKey("/doc0.pdf", 0, 0), "sentences") is None
+    assert cache.get(FileKey("/doc9.pdf", 0, 0), "sentences") is not None
+
+
+def test_document_size_comes_from_columns(sample_pdf_with_text: Path):
+    from mooowu_mcp.cache import estimate_size
+    from mooowu_mcp.pdf_reader import extract_document
+
+    document = extract_document(sample_pdf_with_text)
+    walked = estimate_size([document.blocks, document.sentences, document.images])
+
+    assert estimate_size(document) == document.nbytes
+    assert walked / 2 < document.nbytes < walked * 2
+
+
+def test_explicit_size_skips_estimate():
+    from mooowu_mcp.cache import ExtractionCache, FileKey
+
+    cache = ExtractionCache(max_bytes=4096)
+    cache.put(FileKey("/doc.pdf", 0, 0), "sentences", ["x" * 10000], nbytes=100)
+
+    assert cache.stats().bytes == 100
+
+
+def test_invalidate_by_path(sample_pdf_with_image: Path):
+    from mooowu_mcp.cache import get_extraction_cache
+    from mooowu_mcp.content_filter import get_image_regions
+
+    cache = get_extraction_cache()
+    get_image_regions(sample_pdf_with_image)
+
+    assert cache.invalidate(sample_pdf_with_image) == 1
+    assert cache.get(cache.key_for(sample_pdf_with_image), "images") is None
@@ -86,6 +86,43 @@ def test_get_image_regions_detects_images(sample_pdf_with_image: Path):
         assert y1 > y0
 
 
+def test_get_image_regions_skips_text_extraction(
+    sample_pdf_with_image: Path, monkeypatch
+):
+    from mooowu_mcp import pdf_reader
+    from mooowu_mcp.content_filter import get_image_regions
+
+    expected = pdf_reader.extract_document(sample_pdf_with_image).images
+
+    def fail(*args, **kwargs):
+        raise AssertionError("text extraction should not run")
+
+    monkeypatch.setattr(pdf_reader, "_visit_page", fail)
+
+    assert get_image_regions(sample_pdf_with_image) == expected
+
+
+def test_get_image_regions_includes_drawings(temp_dir: Path):
+    import pymupdf
+
+    from mooowu_mcp.content_filter import get_image_regions
+
+    pdf_path = temp_dir / "drawing.pdf"
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "A caption above the chart.", fontsize=12)
+    page.draw_rect(pymupdf.Rect(100, 100, 300, 250), color=(0, 0, 1), fill=(1, 0, 0))
+    doc.save(pdf_path)
+    doc.close()
+
+    assert get_image_regions(pdf_path) == []
+    regions = get_image_regions(pdf_path, include_drawings=True)
+    assert len(regions) == 1
+    assert regions[0].page_num == 0
+    x0, y0, x1, y1 = regions[0].bbox
+    assert x0 <= 100 and y0 <= 100 and x1 >= 300 and y1 >= 250
+
+
 def test_no_images_returns_empty_list(sample_pdf_with_text: Path):
     from mooowu_mcp.content_filter import get_image_regions
 
@@ -156,3 +193,71 @@ def test_filter_sentences_keeps_regular_text(sample_pdf_with_text: Path):
     filtered = filter_sentences(sentences, sample_pdf_with_text)
 
     assert len(filtered) == len(sentences)
+
+
+def test_span_keep_mask_flags_code_and_image_spans():
+    from mooowu_mcp.content_filter import (
+        ImageRegion,
+        pack_sentence_spans,
+        span_keep_mask,
+    )
+    from mooowu_mcp.pdf_reader import Sentence
+
+    spans = [
+        TextSpan("regular", (10, 10, 50, 30), "Helvetica", 12, 0),
+        TextSpan("code", (10, 40, 50, 60), "Courier", 10, 0),
+        TextSpan("inside", (100, 120, 150, 140), "Helvetica", 12, 0),
+        TextSpan("other page", (100, 120, 150, 140), "Helvetica", 12, 1),
+    ]
+    sentences = [
+        Sentence("regular code", spans[:2], 0),
+        Sentence("inside", spans[2:3], 0),
+        Sentence("other page", spans[3:], 1),
+    ]
+    images = [ImageRegion((72, 100, 200, 200), 0)]
+
+    packed = pack_sentence_spans(sentences)
+    keep = span_keep_mask(packed, images)
+
+    assert packed.bboxes.shape == (4, 4)
+    assert keep.tolist() == [True, False, False, True]
+
+
+def test_filter_sentences_materializes_only_survivors(sample_pdf_mixed: Path):
+    from mooowu_mcp.pdf_reader import extract_sentences
+    from mooowu_mcp.content_filter import filter_sentences
+
+    sentences = extract_sentences(sample_pdf_mixed)
+    filtered = filter_sentences(sentences, sample_pdf_mixed)
+
+    texts = [s.text for s in filtered]
+    assert any("Conclusion paragraph" in t for t in texts)
+    assert not any("console.log" in t for t in texts)
+    conclusion = next(s for s in filtered if "Conclusion" in s.text)
+    assert any(conclusion is s for s in sentences)
+
+
+def test_filter_indexes_image_list_once(monkeypatch):
+    from mooowu_mcp import content_filter
+    from mooowu_mcp.content_filter import filter_image_overlapping_spans, ImageRegion
+
+    built: list[int] = []
+
+    class CountingIndex(content_filter.SpatialIndex):
+        def __init__(self, regions, *args, **kwargs):
+            built.append(len(regions))
+            super().__init__(regions, *args, **kwargs)
+
+    monkeypatch.setattr(content_filter, "SpatialIndex", CountingIndex)
+    spans = [
+        TextSpan(f"span {i}", (10, 20 * i, 50, 20 * i + 10), "Helvetica", 12, i % 3)
+        for i in range(30)
+    ]
+    images = [ImageRegion((0, 100, 200, 200), page) for page in range(3)]
+
+    filtered = filter_image_overlapping_spans(spans, images)
+
+    assert built == [3]
+    assert [s.text for s in filtered] == [
+        s.text for s in spans if not (s.bbox[1] < 200 and s.bbox[3] > 100)
+    ]
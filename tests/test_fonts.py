@@ -0,0 +1,77 @@
+def test_classify_font_from_name():
+    from mooowu_mcp.fonts import classify_font
+
+    courier = classify_font("Courier-BoldOblique")
+    assert courier.monospace and courier.bold and courier.italic
+    assert not courier.symbol
+
+    helvetica = classify_font("Helvetica")
+    assert not (helvetica.monospace or helvetica.bold or helvetica.italic)
+
+    assert classify_font("ZapfDingbats").symbol
+
+
+def test_classify_font_from_flags():
+    import pymupdf
+
+    from mooowu_mcp.fonts import classify_font
+
+    info = classify_font(
+        "F12",
+        pymupdf.TEXT_FONT_MONOSPACED | pymupdf.TEXT_FONT_BOLD,
+    )
+
+    assert info.monospace
+    assert info.bold
+    assert not info.italic
+
+
+def test_registry_classifies_each_font_once(monkeypatch):
+    from mooowu_mcp import fonts
+
+    calls: list[str] = []
+    classify = fonts.classify_font
+
+    def counting(name: str, flags: int = 0) -> fonts.FontInfo:
+        calls.append(name)
+        return classify(name, flags)
+
+    monkeypatch.setattr(fonts, "classify_font", counting)
+
+    registry = fonts.FontRegistry()
+    ids = [registry.intern(name) for name in ["Times", "Courier", "Times"] * 100]
+
+    assert ids[:3] == [0, 1, 0]
+    assert [registry.info(font_id).monospace for font_id in ids[:3]] == [
+        False,
+        True,
+        False,
+    ]
+    assert registry.code_mask() == [False, True]
+    assert registry.code_fonts() == ["Courier"]
+    assert calls == ["Times", "Courier"]
+
+
+def test_registry_pickles_names_and_flags():
+    import pickle
+
+    import pymupdf
+
+    from mooowu_mcp.fonts import FontRegistry
+
+    registry = FontRegistry()
+    registry.intern("Helvetica")
+    registry.intern("F3", pymupdf.TEXT_FONT_MONOSPACED)
+
+    restored = pickle.loads(pickle.dumps(registry))
+
+    assert restored.names == ["Helvetica", "F3"]
+    assert restored.code_fonts() == ["F3"]
+    assert restored.intern("F3") == 1
+
+
+def test_content_filter_reexports_font_helpers():
+    from mooowu_mcp import content_filter, fonts
+
+    assert content_filter.MONOSPACE_FONTS is fonts.MONOSPACE_FONTS
+    assert content_filter.is_code_font is fonts.is_code_font
@@ -116,3 +116,163 @@ def test_highlight_with_custom_color(sample_pdf_with_text: Path, temp_dir: Path)
     )
 
     assert result.exists()
+
+
+def test_incremental_save_appends_to_copy(sample_pdf_large: Path, temp_dir: Path):
+    from mooowu_mcp.highlighter import highlight_spans
+    from mooowu_mcp.pdf_reader import extract_all_spans
+
+    spans = extract_all_spans(sample_pdf_large)
+    output_path = temp_dir / "incremental.pdf"
+
+    result = highlight_spans(
+        sample_pdf_large, spans[:3], output_path, save_mode="incremental"
+    )
+
+    source = sample_pdf_large.read_bytes()
+    written = result.read_bytes()
+    assert written.startswith(source)
+    doc = pymupdf.open(str(result))
+    assert sum(len(list(page.annots())) for page in doc) >= 1
+    doc.close()
+
+
+def test_incremental_save_updates_previous_output(
+    sample_pdf_multipage: Path, temp_dir: Path
+):
+    from mooowu_mcp.highlighter import highlight_text_in_pdf
+
+    output_path = temp_dir / "incremental.pdf"
+    highlight_text_in_pdf(
+        sample_pdf_multipage, "page 1", output_path, save_mode="incremental"
+    )
+    first_size = output_path.stat().st_size
+    highlight_text_in_pdf(
+        sample_pdf_multipage, "page 3", output_path, save_mode="incremental"
+    )
+
+    assert output_path.stat().st_size > first_size
+    doc = pymupdf.open(str(output_path))
+    assert len(list(doc[0].annots())) >= 1
+    assert len(list(doc[2].annots())) >= 1
+    doc.close()
+
+
+def test_unknown_save_mode_rejected(sample_pdf_with_text: Path, temp_dir: Path):
+    import pytest
+    from mooowu_mcp.highlighter import highlight_text_in_pdf
+
+    with pytest.raises(ValueError):
+        highlight_text_in_pdf(
+            sample_pdf_with_text, "first", temp_dir / "out.pdf", save_mode="fast"
+        )
+
+
+def test_highlight_spans_preserves_toc_and_untouched_pages(
+    sample_pdf_with_toc: Path, temp_dir: Path
+):
+    from mooowu_mcp.highlighter import highlight_spans_parallel
+    from mooowu_mcp.pdf_reader import extract_all_spans
+
+    spans = [s for s in extract_all_spans(sample_pdf_with_toc) if s.page_num in (2, 7)]
+    output_path = temp_dir / "highlighted.pdf"
+    highlight_spans_parallel(sample_pdf_with_toc, spans, output_path)
+
+    original = pymupdf.open(str(sample_pdf_with_toc))
+    doc = pymupdf.open(str(output_path))
+    assert doc.get_toc() == original.get_toc()
+    annotated = {page.number for page in doc if list(page.annots())}
+    assert annotated == {2, 7}
+    assert sum(len(list(page.annots())) for page in doc) == len(spans)
+    original.close()
+    doc.close()
+
+
+def test_compute_highlight_geometry_groups_by_page(
+    sample_pdf_large: Path, monkeypatch
+):
+    from mooowu_mcp import highlighter
+    from mooowu_mcp.pdf_reader import extract_all_spans
+
+    spans = extract_all_spans(sample_pdf_large)
+    groups = [[span] for span in spans]
+    serial = highlighter.compute_highlight_geometry(groups, parallel=False)
+
+    monkeypatch.setattr(highlighter, "PARALLEL_GEOMETRY_MIN_PAGES", 1)
+    parallel = highlighter.compute_highlight_geometry(groups, parallel=True)
+
+    assert serial == parallel
+    assert [g.page_num for g in serial] == sorted({s.page_num for s in spans})
+    assert sum(len(g.annotations) for g in serial) == len(spans)
+
+
+def test_coalesce_rects_merges_same_line_neighbours():
+    from mooowu_mcp.highlighter import _coalesce_rects
+
+    rects = [(10, 10, 50, 20), (51, 10, 90, 20), (10, 30, 40, 40)]
+
+    assert _coalesce_rects(rects) == [(10, 10, 90, 20), (10, 30, 40, 40)]
+
+
+def test_highlight_sentences_deduplicates_spans(
+    sample_pdf_multipage: Path, temp_dir: Path
+):
+    from mooowu_mcp.highlighter import highlight_sentences
+    from mooowu_mcp.pdf_reader import extract_sentences
+
+    sentences = extract_sentences(sample_pdf_multipage)
+    once = highlight_sentences(sample_pdf_multipage, sentences, temp_dir / "once.pdf")
+    twice = highlight_sentences(
+        sample_pdf_multipage, sentences + sentences, temp_dir / "twice.pdf"
+    )
+
+    counts = []
+    for path in (once, twice):
+        doc = pymupdf.open(str(path))
+        counts.append(sum(len(list(page.annots())) for page in doc))
+        doc.close()
+
+    assert counts[0] == counts[1]
+    assert 0 < counts[0] <= len(sentences)
+
+
+def test_incremental_repeat_does_not_duplicate(sample_pdf_large: Path, temp_dir: Path):
+    from mooowu_mcp.highlighter import highlight_spans, highlight_text_in_pdf
+    from mooowu_mcp.pdf_reader import extract_all_spans
+
+    spans = extract_all_spans(sample_pdf_large)
+    output_path = temp_dir / "incremental.pdf"
+    counts = []
+    for _ in range(2):
+        highlight_spans(
+            sample_pdf_large, spans[:3], output_path, save_mode="incremental"
+        )
+        highlight_text_in_pdf(
+            sample_pdf_large, "Page 2", output_path, save_mode="incremental"
+        )
+        doc = pymupdf.open(str(output_path))
+        counts.append([len(list(page.annots())) for page in doc])
+        doc.close()
+
+    assert counts[0] == counts[1]
+    assert counts[0][0] >= 1 and counts[0][1] >= 1
+
+
+def test_incremental_replaces_output_of_other_document(
+    sample_pdf_with_text: Path, sample_pdf_multipage: Path, temp_dir: Path
+):
+    from mooowu_mcp.highlighter import highlight_text_in_pdf
+
+    output_path = temp_dir / "incremental.pdf"
+    highlight_text_in_pdf(
+        sample_pdf_multipage, "page 1", output_path, save_mode="incremental"
+    )
+    highlight_text_in_pdf(
+        sample_pdf_with_text, "first sentence", output_path, save_mode="incremental"
+    )
+
+    doc = pymupdf.open(str(output_path))
+    assert len(doc) == 1
+    assert "first sentence" in doc[0].get_text()
+    assert len(list(doc[0].annots())) == 1
+    doc.close()
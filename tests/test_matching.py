@@ -0,0 +1,52 @@
+from mooowu_mcp.pdf_reader import Sentence, TextSpan
+
+
+def _sentence(text: str) -> Sentence:
+    span = TextSpan(text, (0, 0, 100, 10), "Helvetica", 12, 0)
+    return Sentence(text=text, spans=[span], page_num=0)
+
+
+def test_normalize_folds_ligatures_and_whitespace():
+    from mooowu_mcp.matching import normalize_text
+
+    assert normalize_text("The  ﬁrst\n eﬀect") == "The first effect"
+
+
+def test_normalize_joins_hyphenation():
+    from mooowu_mcp.matching import normalize_text
+
+    assert normalize_text("extrac- tion of text") == "extraction of text"
+
+
+def test_exact_lookup_ignores_whitespace():
+    from mooowu_mcp.matching import SentenceIndex
+
+    sentences = [_sentence("Alpha beta gamma."), _sentence("Delta epsilon.")]
+    index = SentenceIndex(sentences)
+
+    match = index.lookup("Delta   epsilon.")
+
+    assert match is not None
+    assert match.exact
+    assert match.sentence is sentences[1]
+
+
+def test_fuzzy_lookup_reports_score():
+    from mooowu_mcp.matching import SentenceIndex
+
+    sentences = [_sentence("The quick brown fox jumps over the lazy dog.")]
+    index = SentenceIndex(sentences)
+
+    match = index.lookup("The quick brown fox jumped over the lazy dog.")
+
+    assert match is not None
+    assert not match.exact
+    assert 0.8 <= match.score < 1.0
+
+
+def test_unrelated_lookup_misses():
+    from mooowu_mcp.matching import SentenceIndex
+
+    index = SentenceIndex([_sentence("This is the first sentence.")])
+
+    assert index.lookup("Nonexistent sentence.") is None
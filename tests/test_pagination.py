@@ -0,0 +1,56 @@
+def _sentences(pages: list[int]):
+    from mooowu_mcp.pdf_reader import Sentence
+
+    return [
+        Sentence(text=f"s{i}", spans=[], page_num=page) for i, page in enumerate(pages)
+    ]
+
+
+def test_cursor_round_trip():
+    from mooowu_mcp.pagination import Cursor, decode_cursor, encode_cursor
+
+    cursor = Cursor("abc", "filtered:document", 12, 3)
+    token = encode_cursor(cursor)
+
+    assert "=" not in token
+    assert decode_cursor(token) == cursor
+
+
+def test_decode_cursor_rejects_garbage():
+    import pytest
+
+    from mooowu_mcp.pagination import decode_cursor
+
+    for token in ["not a cursor", "", "WzIsImEiXQ", "W10"]:
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor(token)
+
+
+def test_paginate_visits_every_sentence_once():
+    from mooowu_mcp.pagination import paginate_sentences
+
+    sentences = _sentences([0, 0, 0, 1, 3, 3, 3, 3, 4])
+    seen = []
+    cursor = None
+    while True:
+        page = paginate_sentences(sentences, 2, cursor, "doc", "scope")
+        seen.extend(page.sentences)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == sentences
+
+
+def test_paginate_rejects_cursor_from_other_scope():
+    import pytest
+
+    from mooowu_mcp.pagination import paginate_sentences
+
+    sentences = _sentences([0, 1, 2])
+    page = paginate_sentences(sentences, 1, None, "doc", "scope")
+
+    with pytest.raises(ValueError, match="does not match"):
+        paginate_sentences(sentences, 1, page.next_cursor, "doc", "other")
+    with pytest.raises(ValueError, match="limit"):
+        paginate_sentences(sentences, 0, None, "doc", "scope")
@@ -55,21 +55,210 @@ def test_parallel_processing_completes_in_reasonable_time(sample_pdf_large: Path
     assert elapsed < 10.0
 
 
-def test_read_pdf_tool_with_large_pdf(sample_pdf_large: Path):
+async def test_read_pdf_tool_with_large_pdf(sample_pdf_large: Path):
     from mooowu_mcp.server import read_pdf
 
-    result = read_pdf(str(sample_pdf_large))
+    result = await read_pdf(str(sample_pdf_large))
 
     assert "Page 1:" in result
     assert "Page 50:" in result
     assert "def process_page" not in result
 
 
-def test_analyze_pdf_tool_with_large_pdf(sample_pdf_large: Path):
+async def test_analyze_pdf_tool_with_large_pdf(sample_pdf_large: Path):
     from mooowu_mcp.server import analyze_pdf
 
-    result = analyze_pdf(str(sample_pdf_large))
+    result = await analyze_pdf(str(sample_pdf_large))
 
     assert result["page_count"] == 50
     assert result["sentence_count"] >= 100
     assert result["code_block_sentence_count"] >= 50
+
+
+def test_executor_is_reused_across_calls(sample_pdf_large: Path):
+    from mooowu_mcp.parallel import get_executor
+    from mooowu_mcp.pdf_reader import extract_sentences
+
+    executor = get_executor()
+    extract_sentences(sample_pdf_large)
+    extract_sentences(sample_pdf_large)
+
+    assert get_executor() is executor
+
+
+def test_warm_pool_starts_workers():
+    from mooowu_mcp.parallel import warm_pool, get_executor, _ping
+
+    warm_pool()
+
+    assert get_executor().submit(_ping).result() > 0
+
+
+def test_shutdown_pool_recreates_lazily():
+    from mooowu_mcp.parallel import get_executor, shutdown_pool
+
+    executor = get_executor()
+    shutdown_pool()
+
+    assert get_executor() is not executor
+
+
+class _RecordingContext:
+    def __init__(self):
+        self.progress: list[tuple[float, float | None]] = []
+        self.logs: list[str] = []
+
+    async def report_progress(self, progress, total=None, message=None):
+        self.progress.append((progress, total))
+
+    async def log(self, level, message, logger_name=None):
+        self.logs.append(message)
+
+
+async def test_read_pdf_stream_reports_page_progress(sample_pdf_large: Path):
+    from mooowu_mcp.cache import get_extraction_cache
+    from mooowu_mcp.server import read_pdf
+
+    get_extraction_cache().invalidate(sample_pdf_large)
+    ctx = _RecordingContext()
+
+    streamed = await read_pdf(str(sample_pdf_large), stream=True, ctx=ctx)
+
+    assert len(ctx.progress) > 1
+    assert ctx.progress[-1] == (50, 50)
+    assert [p for p, _ in ctx.progress] == sorted(p for p, _ in ctx.progress)
+    assert ctx.logs[0].startswith("Page 1:")
+    assert streamed == await read_pdf(str(sample_pdf_large))
+    assert "\n".join(ctx.logs) == streamed
+
+
+async def test_read_pdf_stream_returns_text_to_mcp_clients(sample_pdf_large: Path):
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    from mooowu_mcp.server import mcp, read_pdf
+
+    logs: list[str] = []
+
+    async def on_log(params):
+        logs.append(params.data)
+
+    async with create_connected_server_and_client_session(
+        mcp._mcp_server, logging_callback=on_log
+    ) as session:
+        result = await session.call_tool(
+            "read_pdf", {"pdf_path": str(sample_pdf_large), "stream": True}
+        )
+
+    text = await read_pdf(str(sample_pdf_large))
+    assert not result.isError
+    assert result.content[0].text == text
+    assert "\n".join(logs) == text
+
+
+def test_cost_balanced_ranges_split_expensive_pages(monkeypatch):
+    from mooowu_mcp import parallel
+
+    monkeypatch.setattr(parallel, "MAX_WORKERS", 4)
+    costs = {page: 100.0 if page < 10 else 1.0 for page in range(40)}
+
+    ranges = parallel.get_page_ranges("doc.pdf", 40, costs=costs)
+
+    covered = [page for r in ranges for page in range(r.start, r.end)]
+    assert covered == list(range(40))
+    assert max(r.end - r.start for r in ranges if r.start < 10) < 10
+    assert all(r.end - r.start <= parallel.DEFAULT_CHUNK_SIZE for r in ranges)
+    assert sum(r.cost for r in ranges) == sum(costs.values())
+
+
+def test_estimate_page_costs_counts_images(sample_pdf_with_image: Path):
+    from mooowu_mcp.parallel import BASE_PAGE_COST, IMAGE_PAGE_COST
+    from mooowu_mcp.parallel import estimate_page_costs
+
+    costs = estimate_page_costs(sample_pdf_with_image)
+
+    assert costs[0] >= BASE_PAGE_COST + IMAGE_PAGE_COST
+
+
+def test_page_costs_are_estimated_once_per_file(sample_pdf_large: Path, monkeypatch):
+    from mooowu_mcp import parallel
+
+    calls: list[int] = []
+    estimate = parallel._estimate_costs
+
+    def counting(doc, page_nums):
+        calls.append(len(page_nums))
+        return estimate(doc, page_nums)
+
+    monkeypatch.setattr(parallel, "_estimate_costs", counting)
+    parallel._page_costs.clear()
+
+    selected = parallel.estimate_page_costs(sample_pdf_large, [3, 4])
+    full = parallel.estimate_page_costs(sample_pdf_large)
+
+    assert parallel.estimate_page_costs(sample_pdf_large) == full
+    assert parallel.estimate_page_costs(sample_pdf_large, [4, 3]) == {
+        4: selected[4],
+        3: selected[3],
+    }
+    assert calls == [2, 48]
+
+
+def test_small_documents_skip_cost_estimation(monkeypatch):
+    from mooowu_mcp import parallel
+
+    monkeypatch.setattr(parallel, "MAX_WORKERS", 4)
+
+    assert parallel._balancing_costs("missing.pdf", 40, None) is None
+
+
+def test_cost_balanced_extraction_keeps_page_order(
+    sample_pdf_large: Path, monkeypatch
+):
+    from mooowu_mcp import parallel
+    from mooowu_mcp.pdf_reader import _extract_document_uncached
+
+    monkeypatch.setattr(parallel, "MAX_WORKERS", 4)
+    document = _extract_document_uncached(sample_pdf_large)
+
+    page_nums = [block.page_num for block in document.blocks]
+    assert page_nums == sorted(page_nums)
+    assert len(set(page_nums)) == 50
+
+
+def test_worker_document_handles_are_reused(
+    sample_pdf_large: Path, sample_pdf_with_text: Path, monkeypatch
+):
+    import os
+
+    from mooowu_mcp import parallel
+
+    monkeypatch.setattr(parallel, "_in_worker", True)
+    monkeypatch.setattr(parallel, "_worker_documents", parallel.OrderedDict())
+    monkeypatch.setattr(parallel, "WORKER_DOCUMENT_CACHE_SIZE", 1)
+
+    with parallel.open_document(sample_pdf_large) as first:
+        pass
+    with parallel.open_document(sample_pdf_large) as second:
+        pass
+    assert first is second
+    assert not first.is_closed
+
+    stat = os.stat(sample_pdf_large)
+    os.utime(sample_pdf_large, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with parallel.open_document(sample_pdf_large) as reopened:
+        pass
+    assert reopened is not first
+    assert first.is_closed
+
+    with parallel.open_document(sample_pdf_with_text):
+        pass
+    assert reopened.is_closed
+    assert len(parallel._worker_documents) == 1
+
+
+def test_open_document_closes_outside_workers(sample_pdf_large: Path):
+    from mooowu_mcp.parallel import open_document
+
+    with open_document(sample_pdf_large) as doc:
+        assert len(doc) == 50
+    assert doc.is_closed
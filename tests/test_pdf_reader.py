@@ -94,3 +94,228 @@ def test_extract_sentences_multipage(sample_pdf_multipage: Path):
     assert 0 in page_nums
     assert 1 in page_nums
     assert 2 in page_nums
+
+
+def test_extract_document_single_pass(sample_pdf_mixed: Path):
+    from mooowu_mcp.pdf_reader import extract_document
+
+    document = extract_document(sample_pdf_mixed)
+
+    assert document.page_count == 1
+    assert len(document.images) == 1
+    assert len(document.blocks) >= 2
+    block_span_ids = {id(span) for span in document.spans}
+    for sentence in document.sentences:
+        assert all(id(span) in block_span_ids for span in sentence.spans)
+
+
+def test_split_block_maps_spans_by_offset():
+    from mooowu_mcp.pdf_reader import TextBlock, TextSpan, _split_block_to_sentences
+
+    spans = [
+        TextSpan("First sentence. Second", (0, 0, 100, 10), "Helvetica", 12, 0),
+        TextSpan("sentence continues.", (0, 10, 100, 20), "Helvetica", 12, 0),
+        TextSpan("Third one!", (0, 20, 100, 30), "Helvetica", 12, 0),
+    ]
+    block = TextBlock(spans=spans, bbox=(0, 0, 100, 30), page_num=0)
+
+    sentences = _split_block_to_sentences(block)
+
+    assert [s.text for s in sentences] == [
+        "First sentence.",
+        "Second sentence continues.",
+        "Third one!",
+    ]
+    assert sentences[0].spans == [spans[0]]
+    assert sentences[1].spans == [spans[0], spans[1]]
+    assert sentences[2].spans == [spans[2]]
+
+
+def test_split_block_keeps_abbreviations_and_decimals():
+    from mooowu_mcp.pdf_reader import TextBlock, TextSpan, _split_block_to_sentences
+
+    spans = [
+        TextSpan("See Fig. 3 and e.g. the value 3.", (0, 0, 100, 10), "Helv", 12, 0),
+        TextSpan("14 from J. Smith et al. in 2020.", (0, 10, 100, 20), "Helv", 12, 0),
+        TextSpan("Done.", (0, 20, 100, 30), "Helv", 12, 0),
+    ]
+    block = TextBlock(spans=spans, bbox=(0, 0, 100, 30), page_num=0)
+
+    sentences = _split_block_to_sentences(block)
+
+    assert len(sentences) == 2
+    assert sentences[0].text.endswith("in 2020.")
+    assert sentences[1].text == "Done."
+
+
+def test_split_block_ends_sentence_after_decimal():
+    from mooowu_mcp.pdf_reader import TextBlock, TextSpan, _split_block_to_sentences
+
+    spans = [TextSpan("The value is 3.5. Next one.", (0, 0, 100, 10), "Helv", 12, 0)]
+    block = TextBlock(spans=spans, bbox=(0, 0, 100, 10), page_num=0)
+
+    sentences = _split_block_to_sentences(block)
+
+    assert [s.text for s in sentences] == ["The value is 3.5.", "Next one."]
+
+
+def test_span_table_views_keep_attribute_api():
+    from mooowu_mcp.pdf_reader import SpanTable
+
+    table = SpanTable()
+    first = table.append("Hello", (1, 2, 3, 4), "Helvetica", 12, 0)
+    second = table.append("world", (5, 6, 7, 8), "Helvetica", 12, 1)
+
+    assert len(table) == 2
+    assert table.fonts.names == ["Helvetica"]
+    assert (first.text, first.bbox, first.font, first.page_num) == (
+        "Hello",
+        (1.0, 2.0, 3.0, 4.0),
+        "Helvetica",
+        0,
+    )
+    assert second.text == "world"
+    assert table[1] is second
+
+
+def test_extracted_content_pickles_compactly(sample_pdf_with_text: Path):
+    import pickle
+
+    from mooowu_mcp.parallel import PageRange
+    from mooowu_mcp.pdf_reader import _extract_content_from_page_range
+
+    pages = _extract_content_from_page_range(
+        PageRange(0, 1, str(sample_pdf_with_text))
+    )
+    restored = pickle.loads(pickle.dumps(pages))
+
+    block_spans = {id(span) for block in restored[0].blocks for span in block.spans}
+    assert restored[0].sentences
+    for sentence in restored[0].sentences:
+        assert all(id(span) in block_spans for span in sentence.spans)
+    assert [s.text for s in restored[0].sentences] == [
+        s.text for s in pages[0].sentences
+    ]
+
+
+def test_sentence_bbox_is_cached():
+    from mooowu_mcp.pdf_reader import Sentence, TextSpan
+
+    sentence = Sentence(
+        text="a b",
+        spans=[
+            TextSpan("a", (10, 10, 20, 20), "Helvetica", 12, 0),
+            TextSpan("b", (5, 15, 30, 25), "Helvetica", 12, 0),
+        ],
+        page_num=0,
+    )
+
+    assert sentence.bbox == (5, 10, 30, 25)
+    assert sentence.bbox is sentence.bbox
+
+
+def test_packed_pages_round_trip(sample_pdf_with_image: Path):
+    import pickle
+
+    from mooowu_mcp.parallel import PageRange
+    from mooowu_mcp.pdf_reader import (
+        PackedPages,
+        _extract_content_from_page_range,
+        unpack_chunks,
+    )
+
+    pages = _extract_content_from_page_range(
+        PageRange(0, 1, str(sample_pdf_with_image))
+    )
+    restored = unpack_chunks(pickle.loads(pickle.dumps([PackedPages(pages)])))
+
+    assert [p.page_num for p in restored] == [p.page_num for p in pages]
+    assert restored[0].blocks == pages[0].blocks
+    assert restored[0].sentences == pages[0].sentences
+    assert restored[0].images == pages[0].images
+    restored_fonts = restored[0].blocks[0].spans[0]._table.fonts
+    assert restored_fonts.names == pages[0].blocks[0].spans[0]._table.fonts.names
+    assert restored_fonts.flags == pages[0].blocks[0].spans[0]._table.fonts.flags
+
+    block_spans = {id(span) for block in restored[0].blocks for span in block.spans}
+    for sentence in restored[0].sentences:
+        assert all(id(span) in block_spans for span in sentence.spans)
+
+
+def test_decoded_chunk_keeps_worker_payload(sample_pdf_with_image: Path):
+    from mooowu_mcp.parallel import PageRange
+    from mooowu_mcp.pdf_reader import (
+        PackedPages,
+        _extract_content_from_page_range,
+        pack_pages,
+    )
+
+    payload = pack_pages(
+        _extract_content_from_page_range(PageRange(0, 1, str(sample_pdf_with_image)))
+    )
+    chunk = PackedPages._from_payload(payload)
+
+    assert chunk.pages
+    assert chunk.payload is payload
+    chunk.release_payload()
+    assert chunk._payload is None
+    assert chunk.pages
+
+
+def test_unpack_pages_rejects_unknown_format():
+    import pytest
+
+    from mooowu_mcp.pdf_reader import pack_pages, unpack_pages
+
+    payload = bytearray(pack_pages([]))
+    payload[:4] = b"XXXX"
+
+    with pytest.raises(ValueError):
+        unpack_pages(bytes(payload))
+
+
+def test_read_page_skips_image_payloads(sample_pdf_with_image: Path, monkeypatch):
+    import pymupdf
+
+    from mooowu_mcp import pdf_reader
+
+    doc = pymupdf.open(str(sample_pdf_with_image))
+    page = doc[0]
+    default = page.get_text("dict")
+    text_lines = [b["lines"] for b in default["blocks"] if b["type"] == 0]
+    image_boxes = [tuple(b["bbox"]) for b in default["blocks"] if b["type"] == 1]
+
+    for pixels in (pdf_reader.INLINE_IMAGE_PIXELS, 0):
+        monkeypatch.setattr(pdf_reader, "INLINE_IMAGE_PIXELS", pixels)
+        page_dict, images = pdf_reader._read_page(page, 0)
+        text_blocks = [b for b in page_dict["blocks"] if b["type"] == 0]
+
+        assert [b["lines"] for b in text_blocks] == text_lines
+        assert [image.bbox for image in images] == image_boxes
+
+    assert all(block["type"] == 0 for block in page_dict["blocks"])
+    doc.close()
+
+
+def test_read_page_finds_inline_images():
+    import pymupdf
+
+    from mooowu_mcp.pdf_reader import _read_page
+
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Caption above an inline image.", fontsize=11)
+    xref = page.get_contents()[0]
+    inline = (
+        b"q 100 0 0 50 72 600 cm "
+        b"BI /W 2 /H 2 /CS /G /BPC 8 ID \x00\xff\xff\x00 EI Q"
+    )
+    doc.update_stream(xref, doc.xref_stream(xref) + b"\n" + inline + b"\n")
+
+    assert page.get_images() == []
+    page_dict, images = _read_page(page, 0)
+    text_blocks = [b for b in page_dict["blocks"] if b["type"] == 0]
+
+    assert [image.bbox for image in images] == [(72.0, 192.0, 172.0, 242.0)]
+    assert text_blocks[0]["lines"][0]["spans"][0]["text"].startswith("Caption")
+    doc.close()
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import pytest
+
+
+def test_parse_page_spec_ranges_and_singles():
+    from mooowu_mcp.selection import parse_page_spec
+
+    assert parse_page_spec("2-4,7", 10) == [1, 2, 3, 6]
+    assert parse_page_spec("9-", 10) == [8, 9]
+    assert parse_page_spec("3,1-2,3", 10) == [0, 1, 2]
+
+
+def test_parse_page_spec_clamps_to_document():
+    from mooowu_mcp.selection import parse_page_spec
+
+    assert parse_page_spec("8-20", 10) == [7, 8, 9]
+
+
+def test_parse_page_spec_rejects_invalid():
+    from mooowu_mcp.selection import parse_page_spec
+
+    with pytest.raises(ValueError):
+        parse_page_spec("5-2", 10)
+    with pytest.raises(ValueError):
+        parse_page_spec("11", 10)
+    with pytest.raises(ValueError):
+        parse_page_spec("abc", 10)
+
+
+def test_section_spans_until_next_sibling(sample_pdf_with_toc: Path):
+    from mooowu_mcp.selection import select_pages
+
+    assert select_pages(sample_pdf_with_toc, section="methods") == [4, 5, 6, 7]
+    assert select_pages(sample_pdf_with_toc, section="Setup") == [5, 6, 7]
+    assert select_pages(sample_pdf_with_toc, section="Results") == [8, 9, 10, 11]
+
+
+def test_section_and_pages_intersect(sample_pdf_with_toc: Path):
+    from mooowu_mcp.selection import select_pages
+
+    assert select_pages(sample_pdf_with_toc, "1-5", "Methods") == [4]
+
+
+def test_unknown_section_raises(sample_pdf_with_toc: Path):
+    from mooowu_mcp.selection import select_pages
+
+    with pytest.raises(ValueError, match="Section not found"):
+        select_pages(sample_pdf_with_toc, section="Appendix")
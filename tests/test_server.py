@@ -8,38 +8,38 @@ def test_server_imports():
     assert callable(main)
 
 
-def test_read_pdf_returns_text(sample_pdf_with_text: Path):
+async def test_read_pdf_returns_text(sample_pdf_with_text: Path):
     from mooowu_mcp.server import read_pdf
 
-    result = read_pdf(str(sample_pdf_with_text))
+    result = await read_pdf(str(sample_pdf_with_text))
 
     assert "first sentence" in result
     assert "second sentence" in result
 
 
-def test_read_pdf_excludes_code(sample_pdf_with_code: Path):
+async def test_read_pdf_excludes_code(sample_pdf_with_code: Path):
     from mooowu_mcp.server import read_pdf
 
-    result = read_pdf(str(sample_pdf_with_code))
+    result = await read_pdf(str(sample_pdf_with_code))
 
     assert "def hello_world" not in result
     assert "print" not in result
     assert "Regular text" in result
 
 
-def test_read_pdf_invalid_path():
+async def test_read_pdf_invalid_path():
     from mooowu_mcp.server import read_pdf
     import pytest
 
     with pytest.raises(FileNotFoundError):
-        read_pdf("/nonexistent/path.pdf")
+        await read_pdf("/nonexistent/path.pdf")
 
 
-def test_highlight_pdf_creates_output(sample_pdf_with_text: Path, temp_dir: Path):
+async def test_highlight_pdf_creates_output(sample_pdf_with_text: Path, temp_dir: Path):
     from mooowu_mcp.server import highlight_pdf
 
     output = temp_dir / "output.pdf"
-    result = highlight_pdf(
+    result = await highlight_pdf(
         str(sample_pdf_with_text),
         ["This is the first sentence."],
         str(output),
@@ -49,11 +49,11 @@ def test_highlight_pdf_creates_output(sample_pdf_with_text: Path, temp_dir: Path
     assert Path(result["output_path"]).exists()
 
 
-def test_highlight_pdf_skips_code(sample_pdf_with_code: Path, temp_dir: Path):
+async def test_highlight_pdf_skips_code(sample_pdf_with_code: Path, temp_dir: Path):
     from mooowu_mcp.server import highlight_pdf
 
     output = temp_dir / "output.pdf"
-    result = highlight_pdf(
+    result = await highlight_pdf(
         str(sample_pdf_with_code),
         ["def hello_world():"],
         str(output),
@@ -63,11 +63,13 @@ def test_highlight_pdf_skips_code(sample_pdf_with_code: Path, temp_dir: Path):
     assert "warnings" in result
 
 
-def test_highlight_pdf_returns_warnings(sample_pdf_with_text: Path, temp_dir: Path):
+async def test_highlight_pdf_returns_warnings(
+    sample_pdf_with_text: Path, temp_dir: Path
+):
     from mooowu_mcp.server import highlight_pdf
 
     output = temp_dir / "output.pdf"
-    result = highlight_pdf(
+    result = await highlight_pdf(
         str(sample_pdf_with_text),
         ["Nonexistent sentence."],
         str(output),
@@ -78,11 +80,11 @@ def test_highlight_pdf_returns_warnings(sample_pdf_with_text: Path, temp_dir: Pa
     assert len(result["warnings"]) == 1
 
 
-def test_highlight_pdf_with_color(sample_pdf_with_text: Path, temp_dir: Path):
+async def test_highlight_pdf_with_color(sample_pdf_with_text: Path, temp_dir: Path):
     from mooowu_mcp.server import highlight_pdf
 
     output = temp_dir / "output.pdf"
-    result = highlight_pdf(
+    result = await highlight_pdf(
         str(sample_pdf_with_text),
         ["This is the first sentence."],
         str(output),
@@ -92,34 +94,314 @@ def test_highlight_pdf_with_color(sample_pdf_with_text: Path, temp_dir: Path):
     assert result["highlighted_count"] == 1
 
 
-def test_analyze_pdf_page_count(sample_pdf_multipage: Path):
+async def test_analyze_pdf_page_count(sample_pdf_multipage: Path):
     from mooowu_mcp.server import analyze_pdf
 
-    result = analyze_pdf(str(sample_pdf_multipage))
+    result = await analyze_pdf(str(sample_pdf_multipage))
 
     assert result["page_count"] == 3
 
 
-def test_analyze_pdf_counts_sentences(sample_pdf_with_text: Path):
+async def test_analyze_pdf_counts_sentences(sample_pdf_with_text: Path):
     from mooowu_mcp.server import analyze_pdf
 
-    result = analyze_pdf(str(sample_pdf_with_text))
+    result = await analyze_pdf(str(sample_pdf_with_text))
 
     assert result["sentence_count"] >= 2
     assert result["highlightable_sentence_count"] >= 2
 
 
-def test_analyze_pdf_detects_code(sample_pdf_with_code: Path):
+async def test_analyze_pdf_detects_code(sample_pdf_with_code: Path):
     from mooowu_mcp.server import analyze_pdf
 
-    result = analyze_pdf(str(sample_pdf_with_code))
+    result = await analyze_pdf(str(sample_pdf_with_code))
 
     assert result["code_block_sentence_count"] >= 1
+    assert any("Courier" in font for font in result["code_fonts"])
+    assert all(
+        info["monospace"] == (info["name"] in result["code_fonts"])
+        for info in result["fonts"]
+    )
+
 
+async def test_analyze_pdf_page_fonts_do_not_depend_on_cache(temp_dir: Path):
+    import pymupdf
 
-def test_analyze_pdf_detects_images(sample_pdf_with_image: Path):
+    from mooowu_mcp.cache import get_extraction_cache
     from mooowu_mcp.server import analyze_pdf
 
-    result = analyze_pdf(str(sample_pdf_with_image))
+    pdf_path = temp_dir / "two_fonts.pdf"
+    doc = pymupdf.open()
+    doc.new_page().insert_text((72, 72), "Plain prose here.", fontname="helv")
+    doc.new_page().insert_text((72, 72), "def main():", fontname="cour")
+    doc.save(pdf_path)
+    doc.close()
+
+    get_extraction_cache().invalidate(pdf_path)
+    cold = await analyze_pdf(str(pdf_path), pages="1")
+    await analyze_pdf(str(pdf_path))
+    warm = await analyze_pdf(str(pdf_path), pages="1")
+
+    assert cold["code_fonts"] == []
+    assert warm["code_fonts"] == cold["code_fonts"]
+    assert warm["fonts"] == cold["fonts"]
+
+
+async def test_analyze_pdf_detects_images(sample_pdf_with_image: Path):
+    from mooowu_mcp.server import analyze_pdf
+
+    result = await analyze_pdf(str(sample_pdf_with_image))
 
     assert result["image_count"] >= 1
+
+
+async def test_analyze_pdf_include_drawings(temp_dir: Path):
+    import pymupdf
+
+    from mooowu_mcp.server import analyze_pdf
+
+    pdf_path = temp_dir / "chart.pdf"
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "The chart shows growth.", fontsize=12)
+    page.draw_rect(pymupdf.Rect(60, 50, 300, 250), fill=(0.8, 0.8, 0.8))
+    page.insert_text((72, 150), "Label inside the chart.", fontsize=12)
+    doc.save(pdf_path)
+    doc.close()
+
+    plain = await analyze_pdf(str(pdf_path))
+    with_drawings = await analyze_pdf(str(pdf_path), include_drawings=True)
+
+    assert plain["image_count"] == 0
+    assert with_drawings["image_count"] == 1
+    assert (
+        with_drawings["highlightable_sentence_count"]
+        < plain["highlightable_sentence_count"]
+    )
+
+
+async def test_highlight_pdf_reports_fuzzy_matches(
+    sample_pdf_with_text: Path, temp_dir: Path
+):
+    from mooowu_mcp.server import highlight_pdf
+
+    output = temp_dir / "output.pdf"
+    result = await highlight_pdf(
+        str(sample_pdf_with_text),
+        ["This is the first  sentence", "This is teh second sentence."],
+        str(output),
+    )
+
+    assert result["highlighted_count"] == 2
+    assert len(result["fuzzy_matches"]) == 2
+    assert "warnings" not in result
+
+
+async def test_read_pdf_section_only_reads_selected_pages(sample_pdf_with_toc: Path):
+    from mooowu_mcp.server import read_pdf
+
+    result = await read_pdf(str(sample_pdf_with_toc), section="Methods")
+
+    assert "Methods page 1." in result
+    assert "Introduction" not in result
+    assert "Results" not in result
+
+
+async def test_analyze_pdf_page_selection(sample_pdf_large: Path):
+    from mooowu_mcp.pdf_reader import extract_document
+    from mooowu_mcp.server import analyze_pdf
+
+    result = await analyze_pdf(str(sample_pdf_large), pages="10-25,40")
+    document = extract_document(sample_pdf_large, list(range(9, 25)) + [39])
+
+    assert result["page_count"] == 50
+    assert result["selected_page_count"] == 17
+    assert {s.page_num for s in document.sentences} == set(range(9, 25)) | {39}
+
+
+async def test_tools_do_not_block_event_loop(sample_pdf_large: Path):
+    import asyncio
+
+    from mooowu_mcp.cache import get_extraction_cache
+    from mooowu_mcp.server import analyze_pdf
+
+    get_extraction_cache().invalidate(sample_pdf_large)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    ticker_task = asyncio.create_task(ticker())
+    results = await asyncio.gather(
+        analyze_pdf(str(sample_pdf_large)),
+        analyze_pdf(str(sample_pdf_large), pages="1-5"),
+    )
+    ticker_task.cancel()
+
+    assert results[0]["page_count"] == 50
+    assert results[1]["selected_page_count"] == 5
+    assert ticks > 1
+
+
+async def test_concurrency_limit_bounds_offloaded_work():
+    import asyncio
+    import threading
+    import time
+
+    from mooowu_mcp import server
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+
+    previous = server.MAX_CONCURRENT_REQUESTS
+    server.set_max_concurrent_requests(2)
+    try:
+        await asyncio.gather(*(server._offload(work) for _ in range(6)))
+    finally:
+        server.set_max_concurrent_requests(previous)
+
+    assert peak == 2
+
+
+async def test_full_queue_rejects_with_busy_error(
+    sample_pdf_with_text: Path, monkeypatch
+):
+    import asyncio
+    import threading
+
+    import pytest
+
+    from mooowu_mcp import server
+    from mooowu_mcp.admission import ServerBusyError
+
+    started = threading.Event()
+    release = threading.Event()
+    opened: list[str] = []
+
+    def work():
+        started.set()
+        release.wait(5)
+
+    def select_pages(pdf_path, pages=None, section=None):
+        opened.append(pdf_path)
+        return None
+
+    monkeypatch.setattr(server, "select_pages", select_pages)
+    previous = (server.MAX_CONCURRENT_REQUESTS, server.MAX_QUEUED_REQUESTS)
+    server.set_max_concurrent_requests(1)
+    server.set_max_queued_requests(0)
+    try:
+        running = asyncio.create_task(server._offload(work))
+        await asyncio.to_thread(started.wait, 5)
+
+        with pytest.raises(ServerBusyError, match="Server busy"):
+            await server.analyze_pdf(str(sample_pdf_with_text))
+        with pytest.raises(ServerBusyError, match="Server busy"):
+            await server.read_pdf(str(sample_pdf_with_text), pages="1")
+        assert opened == []
+
+        release.set()
+        await running
+    finally:
+        release.set()
+        server.set_max_concurrent_requests(previous[0])
+        server.set_max_queued_requests(previous[1])
+
+
+async def test_analyze_pdf_include_timings(sample_pdf_large: Path):
+    from mooowu_mcp.cache import get_extraction_cache
+    from mooowu_mcp.server import analyze_pdf
+
+    get_extraction_cache().invalidate()
+    plain = await analyze_pdf(str(sample_pdf_large))
+    assert "timings" not in plain
+
+    get_extraction_cache().invalidate()
+    result = await analyze_pdf(str(sample_pdf_large), include_timings=True)
+
+    timings = result["timings"]
+    assert {"request_queue", "extract", "filter", "total"} <= set(timings["stages_ms"])
+    assert timings["counters"]["pages"] == 50
+    assert timings["counters"]["response_bytes"] > 0
+    assert all(chunk["result_bytes"] > 0 for chunk in timings["chunks"])
+
+
+async def test_read_pdf_paginates_with_cursor(sample_pdf_large: Path):
+    from mooowu_mcp.server import read_pdf
+
+    full = await read_pdf(str(sample_pdf_large))
+
+    parts: list[str] = []
+    cursor = None
+    calls = 0
+    while True:
+        result = await read_pdf(str(sample_pdf_large), limit=25, cursor=cursor)
+        assert result["sentence_count"] <= 25
+        parts.append(result["text"])
+        cursor = result["next_cursor"]
+        calls += 1
+        if cursor is None:
+            break
+
+    assert calls > 1
+    assert "\n".join(parts) == full
+
+
+async def test_read_pdf_rejects_foreign_cursor(sample_pdf_large: Path):
+    import pytest
+
+    from mooowu_mcp.server import read_pdf
+
+    first = await read_pdf(str(sample_pdf_large), limit=5)
+
+    with pytest.raises(ValueError, match="does not match"):
+        await read_pdf(
+            str(sample_pdf_large), pages="2-3", limit=5, cursor=first["next_cursor"]
+        )
+
+
+async def test_analyze_pdf_counts_only(sample_pdf_with_code: Path):
+    from mooowu_mcp.server import analyze_pdf
+
+    full = await analyze_pdf(str(sample_pdf_with_code))
+    counts = await analyze_pdf(str(sample_pdf_with_code), counts_only=True)
+
+    assert "highlightable_sentences" not in counts
+    for key in (
+        "sentence_count",
+        "highlightable_sentence_count",
+        "code_block_sentence_count",
+        "image_count",
+    ):
+        assert counts[key] == full[key]
+
+
+async def test_analyze_pdf_paginates_sentences(sample_pdf_large: Path):
+    from mooowu_mcp.server import analyze_pdf
+
+    full = await analyze_pdf(str(sample_pdf_large))
+    first = await analyze_pdf(str(sample_pdf_large), limit=10)
+    second = await analyze_pdf(
+        str(sample_pdf_large), limit=10, cursor=first["next_cursor"]
+    )
+
+    assert first["highlightable_sentence_count"] == len(
+        full["highlightable_sentences"]
+    )
+    assert (
+        first["highlightable_sentences"] + second["highlightable_sentences"]
+        == full["highlightable_sentences"][:20]
+    )
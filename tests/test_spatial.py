@@ -0,0 +1,45 @@
+from mooowu_mcp.pdf_reader import ImageRegion
+
+
+def test_overlap_query_limited_to_page():
+    from mooowu_mcp.spatial import SpatialIndex
+
+    index = SpatialIndex(
+        [ImageRegion((72, 100, 200, 200), 0), ImageRegion((300, 300, 400, 400), 1)]
+    )
+
+    assert index.any_overlap((100, 120, 150, 140), 0) is True
+    assert index.any_overlap((100, 120, 150, 140), 1) is False
+    assert index.overlapping((350, 350, 360, 360), 1) == [
+        ImageRegion((300, 300, 400, 400), 1)
+    ]
+
+
+def test_touching_edges_do_not_overlap():
+    from mooowu_mcp.spatial import SpatialIndex
+
+    index = SpatialIndex([ImageRegion((72, 100, 200, 200), 0)])
+
+    assert index.any_overlap((200, 100, 250, 120), 0) is False
+
+
+def test_containment_queries():
+    from mooowu_mcp.spatial import SpatialIndex
+
+    outer = ImageRegion((0, 0, 500, 500), 0)
+    inner = ImageRegion((100, 100, 150, 150), 0)
+    index = SpatialIndex([outer, inner])
+
+    assert index.containing((120, 120, 130, 130), 0) == [outer, inner]
+    assert index.contained_in((90, 90, 200, 200), 0) == [inner]
+
+
+def test_nearest_region():
+    from mooowu_mcp.spatial import SpatialIndex
+
+    near = ImageRegion((300, 300, 320, 320), 0)
+    far = ImageRegion((700, 700, 720, 720), 0)
+    index = SpatialIndex([far, near])
+
+    assert index.nearest((10, 10, 20, 20), 0) == near
+    assert index.nearest((10, 10, 20, 20), 5) is None
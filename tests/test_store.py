@@ -0,0 +1,115 @@
+from pathlib import Path
+import os
+import shutil
+
+import pytest
+
+
+@pytest.fixture
+def store(temp_dir: Path, monkeypatch):
+    from mooowu_mcp import store as store_module
+    from mooowu_mcp.cache import get_extraction_cache
+
+    extraction_store = store_module.ExtractionStore(temp_dir / "store")
+    monkeypatch.setattr(store_module, "_store", extraction_store)
+    monkeypatch.setattr(store_module, "_store_configured", True)
+    get_extraction_cache().invalidate()
+    yield extraction_store
+    get_extraction_cache().invalidate()
+
+
+def _fail_extraction(*args, **kwargs):
+    raise AssertionError("extraction should have been served from the store")
+
+
+def test_store_survives_memory_cache_loss(
+    store, sample_pdf_with_image: Path, monkeypatch
+):
+    from mooowu_mcp import pdf_reader
+    from mooowu_mcp.cache import get_extraction_cache
+
+    first = pdf_reader.extract_document(sample_pdf_with_image)
+    assert list(store.directory.glob("*.mwst"))
+
+    get_extraction_cache().invalidate()
+    monkeypatch.setattr(pdf_reader, "process_pages_parallel", _fail_extraction)
+    second = pdf_reader.extract_document(sample_pdf_with_image)
+
+    assert second.sentences == first.sentences
+    assert second.images == first.images
+    assert second.page_count == first.page_count
+
+
+def test_store_is_keyed_by_content(
+    store, sample_pdf_with_text: Path, temp_dir: Path, monkeypatch
+):
+    from mooowu_mcp import pdf_reader
+
+    first = pdf_reader.extract_sentences(sample_pdf_with_text)
+    copy = temp_dir / "copy.pdf"
+    shutil.copyfile(sample_pdf_with_text, copy)
+
+    monkeypatch.setattr(pdf_reader, "process_pages_parallel", _fail_extraction)
+    assert [s.text for s in pdf_reader.extract_sentences(copy)] == [
+        s.text for s in first
+    ]
+
+
+def test_store_serves_page_selection_from_full_document(
+    store, sample_pdf_large: Path, monkeypatch
+):
+    from mooowu_mcp import pdf_reader
+    from mooowu_mcp.cache import get_extraction_cache
+
+    pdf_reader.extract_document(sample_pdf_large)
+    get_extraction_cache().invalidate()
+    monkeypatch.setattr(pdf_reader, "process_pages_parallel", _fail_extraction)
+
+    document = pdf_reader.extract_document(sample_pdf_large, [3, 4])
+
+    assert {s.page_num for s in document.sentences} == {3, 4}
+    assert document.selected_pages == [3, 4]
+
+
+def test_store_ignores_other_extraction_versions(
+    store, sample_pdf_with_text: Path, temp_dir: Path
+):
+    from mooowu_mcp import pdf_reader
+    from mooowu_mcp.store import ExtractionStore
+
+    pdf_reader.extract_document(sample_pdf_with_text)
+    newer = ExtractionStore(temp_dir / "store", extraction_version=2)
+
+    assert newer.load(sample_pdf_with_text, "document", lambda s: s) is None
+
+
+def test_corrupt_entry_is_dropped(store, sample_pdf_with_text: Path):
+    from mooowu_mcp import pdf_reader
+
+    pdf_reader.extract_document(sample_pdf_with_text)
+    (entry,) = store.directory.glob("*.mwst")
+    entry.write_bytes(entry.read_bytes()[:-10])
+
+    assert pdf_reader.load_stored_document(sample_pdf_with_text) is None
+    assert not entry.exists()
+
+
+def test_store_evicts_least_recently_used(temp_dir: Path):
+    from mooowu_mcp.store import ExtractionStore
+
+    store = ExtractionStore(temp_dir / "store", max_bytes=1000)
+    sources = []
+    for i in range(3):
+        source = temp_dir / f"doc{i}.pdf"
+        source.write_bytes(f"document {i}".encode())
+        sources.append(source)
+        store.save(source, "document", 1, None, [b"x" * 400])
+        entry = store._entry_path(store.content_hash(source), "document")
+        os.utime(entry, (i, i))
+
+    store.evict()
+
+    remaining = {path.name for path in store.directory.glob("*.mwst")}
+    assert len(remaining) <= 2
+    newest = store._entry_path(store.content_hash(sources[2]), "document")
+    assert newest.name in remaining
@@ -0,0 +1,39 @@
+def test_stage_is_noop_without_collector():
+    from mooowu_mcp.timing import active_timings, count, stage
+
+    with stage("extract"):
+        count("pages")
+
+    assert active_timings() is None
+
+
+def test_collect_timings_accumulates_stages_and_counters():
+    from mooowu_mcp.timing import collect_timings, count, stage
+
+    with collect_timings() as timings:
+        with stage("extract"):
+            count("pages", 3)
+        with stage("extract"):
+            count("pages", 2)
+
+    assert set(timings.stages) == {"extract"}
+    assert timings.stages["extract"] >= 0
+    assert timings.counters == {"pages": 5}
+
+
+def test_map_in_pool_records_chunk_timings(sample_pdf_large):
+    from mooowu_mcp.parallel import get_page_ranges, map_in_pool
+    from mooowu_mcp.pdf_reader import _extract_content_from_page_range
+    from mooowu_mcp.timing import collect_timings
+
+    ranges = get_page_ranges(sample_pdf_large, 50)
+    with collect_timings() as timings:
+        pages = map_in_pool(_extract_content_from_page_range, ranges)
+
+    assert len(pages) == len(ranges)
+    assert len(timings.chunks) == len(ranges)
+    assert timings.counters["pages"] == 50
+    assert timings.counters["bytes_pickled"] == sum(
+        chunk.result_bytes for chunk in timings.chunks
+    )
+    assert "worker.get_text" in timings.stages